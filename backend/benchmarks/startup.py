@@ -0,0 +1,97 @@
+"""Backend cold-start benchmark.
+
+    python benchmarks/startup.py [--runs 5] [--json]
+
+Each run uses a fresh interpreter and measures:
+  import_ms       time to `import main`
+  first_response  time from launching uvicorn to the first 200 from GET /
+Run from the backend directory. Keep an eye on both numbers when adding
+imports to main.py or services; heavy dependencies belong behind a lazy
+import in the code path that needs them.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(workdir: str) -> float:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_first_response(workdir: str, timeout: float = 60.0) -> float:
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before serving a request")
+            time.sleep(0.01)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import time and time to first response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {"import_ms": [], "first_response_ms": []}
+    for _ in range(args.runs):
+        # A scratch directory per run, so each start creates a fresh database
+        with tempfile.TemporaryDirectory() as workdir:
+            results["import_ms"].append(measure_import(workdir))
+            results["first_response_ms"].append(measure_first_response(workdir))
+
+    summary = {
+        name: {
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+        for name, values in results.items()
+    }
+    if args.json:
+        print(json.dumps({"runs": args.runs, **summary}))
+        return
+    for name, figures in summary.items():
+        print(f"{name:<18} median {figures['median']:8.1f}  min {figures['min']:8.1f}  max {figures['max']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Remote load-generation agent.
+
+    python load_agent.py --coordinator http://localhost:8000 [--name NAME]
+
+Registers with the backend, waits for shard assignments made by
+POST /loadtest/start with {"agents": N}, runs each one on its own event
+loop and streams histogram deltas back. Start several agents (on one or
+more machines) to spread a test beyond a single host.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+from typing import Dict, Any, List
+
+import httpx
+
+from services.load_workers import drive_shard, REPORT_INTERVAL
+
+
+class ReportChannel:
+    """Buffers shard messages until the next post to the coordinator"""
+
+    def __init__(self):
+        self.messages: List[List[Any]] = []
+
+    def put(self, message):
+        self.messages.append(list(message))
+
+    def take(self) -> List[List[Any]]:
+        messages, self.messages = self.messages, []
+        return messages
+
+
+async def run_assignment(client: httpx.AsyncClient, agent_id: str, assignment: Dict[str, Any]):
+    shard = assignment["shard"]
+    channel = ReportChannel()
+    stop_event = threading.Event()
+
+    async def run_shard():
+        try:
+            await drive_shard(shard, assignment["plan"], assignment["options"], channel, stop_event)
+        except Exception as e:
+            channel.put(("done", shard, {"status": "failed", "error": str(e), "pool": None}))
+
+    print(f"Running shard {shard} of load test {assignment['test_id']}")
+    task = asyncio.create_task(run_shard())
+    while True:
+        await asyncio.wait({task}, timeout=REPORT_INTERVAL / 2)
+        finished = task.done()
+        messages = channel.take()
+        if messages or finished:
+            try:
+                response = await client.post(f"/agents/{agent_id}/report", json={"messages": messages})
+                response.raise_for_status()
+                if response.json().get("stop"):
+                    stop_event.set()
+            except httpx.HTTPError as e:
+                print(f"Report failed: {e}")
+                if not finished:
+                    # Keep the messages for the next attempt
+                    channel.messages[:0] = messages
+        if finished:
+            break
+    print(f"Shard {shard} finished")
+
+
+async def serve(coordinator: str, name: str):
+    info = {"host": socket.gethostname(), "cpus": os.cpu_count(), "pid": os.getpid()}
+    async with httpx.AsyncClient(base_url=coordinator, timeout=10.0) as client:
+        agent_id = None
+        poll_seconds = 25
+        while True:
+            try:
+                if agent_id is None:
+                    response = await client.post("/agents/register", json={"name": name, "info": info})
+                    response.raise_for_status()
+                    agent_id = response.json()["agent_id"]
+                    poll_seconds = response.json().get("poll_seconds", poll_seconds)
+                    print(f"Registered with {coordinator} as {agent_id}")
+
+                response = await client.get(
+                    f"/agents/{agent_id}/plan",
+                    params={"wait": poll_seconds},
+                    timeout=poll_seconds + 10,
+                )
+                if response.status_code == 404:
+                    agent_id = None
+                    continue
+                response.raise_for_status()
+                if response.status_code == 204:
+                    continue
+                await run_assignment(client, agent_id, response.json())
+            except httpx.HTTPError as e:
+                print(f"Coordinator unreachable ({e}); retrying in 5s")
+                await asyncio.sleep(5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-generation agent for the API testing platform")
+    parser.add_argument("--coordinator", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--name", default=None, help="Agent name shown in /agents (default: hostname-pid)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.coordinator.rstrip("/"), args.name or f"{socket.gethostname()}-{os.getpid()}"))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
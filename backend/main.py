@@ -1,27 +1,46 @@
-import multiprocessing
-multiprocessing.set_start_method('spawn', force=True)
-
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, Request, BackgroundTasks
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 import uuid
-from services.api_tester import ApiTester
+import hashlib
+from services.api_tester import ApiTester, pool_delta
+from services.http_cache import ResponseCache
+from services.load_engine import LoadTest, ArchivedLoadTest
+from services.load_history import ColumnarHistory, HISTORY_COLUMNS, downsample
+from services.load_data import Scenario, DATA_FORMATS, resolve_data_file
+from services.load_workers import ShardedLoadTest
+from services.agents import AgentRegistry, DistributedLoadTest
+from services.histogram import RunStats
+from services.scheduler import TestScheduler, SingleFlight
+from services.events import EventBroker
+from services.jobs import Job, JobManager
+from services.catalog import ApiCatalog, encode_cursor, decode_cursor
+from services.reports import ReportRenderer
+from services.charts import ChartRenderer
+from services.burp_importer import BurpStreamParser, CHUNK_SIZE as BURP_CHUNK_SIZE
 import asyncio
-import httpx
-import matplotlib.pyplot as plt
-import io
-from datetime import datetime
-import jinja2
 import os
-import base64
 import xml.etree.ElementTree as ET
-import subprocess
-import threading
-import time
+from functools import partial
+
+# Heavy dependencies (matplotlib, jinja2) are imported by the services that
+# need them on first use, and the HTTP client is created at startup rather
+# than at import, so a cold start only pays for FastAPI and SQLAlchemy.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global api_tester
+    api_tester = create_api_tester()
+    catalog.load()
+    yield
+    await jobs.shutdown()
+    await catalog.close()
+    await api_tester.close()
+    charts.shutdown()
 
-app = FastAPI(title="API Testing Automation Platform")
+app = FastAPI(title="API Testing Automation Platform", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -32,109 +51,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for APIs (replace with database in production)
-apis: List[Dict[str, Any]] = []
-api_tester = ApiTester()
+# Push channel for API status transitions and live load-test aggregates
+events = EventBroker()
 
-# Store process and stats globally (for demo; use a better store in prod)
-loadtest_process = None
-loadtest_stats = {}
-loadtest_running = False
+# Background run-all and performance jobs
+jobs = JobManager(events=events)
 
-def parse_burp_xml(xml_content: str) -> List[Dict[str, Any]]:
-    """Parse Burp Suite XML export format"""
-    try:
-        print("Starting XML parsing...")
-        root = ET.fromstring(xml_content)
-        print(f"XML root tag: {root.tag}")
-        items = []
-        
-        for item in root.findall('.//item'):
-            print(f"Processing item: {item}")
-            request = item.find('request')
-            response = item.find('response')
-            
-            if request is None or response is None:
-                print(f"Skipping item - missing request or response: {item}")
-                continue
-            
-            # Parse request
-            request_text = request.text
-            if request.get('base64') == 'true':
-                try:
-                    request_text = base64.b64decode(request_text).decode('utf-8')
-                except Exception as e:
-                    print(f"Error decoding base64 request: {e}")
-                    continue
-            
-            # Parse response
-            response_text = response.text
-            if response.get('base64') == 'true':
-                try:
-                    response_text = base64.b64decode(response_text).decode('utf-8')
-                except Exception as e:
-                    print(f"Error decoding base64 response: {e}")
-                    continue
-            
-            # Parse request headers and body
-            try:
-                request_lines = request_text.split('\n')
-                if not request_lines:
-                    print("Empty request lines")
-                    continue
-                    
-                first_line = request_lines[0]
-                if not first_line:
-                    print("Empty first line")
-                    continue
-                    
-                parts = first_line.split(' ')
-                if len(parts) < 3:
-                    print(f"Invalid first line format: {first_line}")
-                    continue
-                    
-                method, path, _ = parts
-                headers = {}
-                body = None
-                body_started = False
-                
-                for line in request_lines[1:]:
-                    if not line.strip():
-                        body_started = True
-                        continue
-                        
-                    if not body_started:
-                        if ':' in line:
-                            key, value = line.split(':', 1)
-                            headers[key.strip()] = value.strip()
-                    else:
-                        if body is None:
-                            body = line
-                        else:
-                            body += '\n' + line
-                
-                items.append({
-                    'request': {
-                        'method': method,
-                        'url': item.find('url').text,
-                        'headers': headers,
-                        'body': body
-                    },
-                    'response': {
-                        'status_code': int(item.find('status').text),
-                        'headers': {},  # You can parse response headers if needed
-                        'body': response_text
-                    }
-                })
-            except Exception as e:
-                print(f"Error processing request/response: {e}")
-                continue
-        
-        print(f"Successfully parsed {len(items)} items")
-        return items
-    except Exception as e:
-        print(f"Error parsing XML: {e}")
-        raise
+# API catalog: SQLite-backed, with an in-memory id index in front
+catalog = ApiCatalog(events=events)
+
+# Shared HTTP client for all tests; created by lifespan() at startup
+api_tester: Optional[ApiTester] = None
+
+def create_api_tester() -> ApiTester:
+    return ApiTester(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        max_connections_per_host=int(os.getenv("HTTP_MAX_PER_HOST", "0")) or None,
+        http2=os.getenv("HTTP2", "false").lower() == "true",
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+        read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+        pool_timeout=float(os.getenv("HTTP_POOL_TIMEOUT", "10")),
+        capture_limit=int(os.getenv("RESPONSE_CAPTURE_LIMIT_KB", "1024")) * 1024,
+        # Opt-in: functional re-runs revalidate with ETag/Last-Modified
+        cache=ResponseCache(
+            max_entries=int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "1000")),
+            ttl=float(os.getenv("HTTP_CACHE_TTL", "300")),
+            max_bytes=int(os.getenv("HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        ) if os.getenv("HTTP_CACHE", "false").lower() == "true" else None,
+    )
+
+# Latency/error aggregate over all functional (single, run-all, upload) tests
+functional_stats = RunStats()
+
+# HTML test report, cached per catalog version
+report_renderer = ReportRenderer()
+
+# PNG charts, drawn in a lazily started process pool; series are
+# downsampled to CHART_POINTS before being sent to it
+charts = ChartRenderer(workers=int(os.getenv("CHART_WORKERS", "1")))
+CHART_POINTS = 1000
+
+# Idle push connections get a heartbeat this often
+EVENT_HEARTBEAT_SECONDS = 15
+
+# Listing endpoints: page size cap, fields dropped by include_bodies=false,
+# and a per-process ETag prefix so versions don't collide across restarts
+MAX_PAGE_SIZE = 1000
+BODY_FIELDS = ("original_request", "original_response")
+ETAG_EPOCH = uuid.uuid4().hex[:8]
+
+# Bounded concurrency for run-all and upload test runs
+scheduler = TestScheduler(
+    max_concurrency=int(os.getenv("MAX_CONCURRENT_TESTS", "50")),
+    max_per_host=int(os.getenv("MAX_TESTS_PER_HOST", "10")),
+)
+
+# Coalesces identical in-flight functional tests (run-all with coalesce=true);
+# only safe methods may share a response: two PUTs or DELETEs with the same
+# content are still two state changes to test
+in_flight = SingleFlight()
+COALESCABLE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Cap on per-request samples returned by performance tests
+MAX_RESULT_SAMPLES = 1000
+
+# Remote load agents (load_agent.py) and how long their plan polls are held
+agents = AgentRegistry()
+AGENT_POLL_SECONDS = 25
+
+# Every load test's per-second history is stored in columns under <dir>/<id>/;
+# /loadtest/history downsamples to at most this many points
+LOADTEST_HISTORY_DIR = os.getenv("LOADTEST_HISTORY_DIR", "loadtest_history")
+MAX_HISTORY_POINTS = 5000
+
+# Uploaded CSV / JSON data files that parameterized load tests stream rows from
+LOADTEST_DATA_DIR = os.getenv("LOADTEST_DATA_DIR", "loadtest_data")
+DATA_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Load tests by id; status/stop/report default to the latest one. Finished
+# tests past the cap are archived to their history directory and read back
+# from there on demand
+loadtests: Dict[str, LoadTest] = {}
+latest_loadtest_id: Optional[str] = None
+MAX_FINISHED_LOADTESTS = int(os.getenv("MAX_FINISHED_LOADTESTS", "20"))
 
 def convert_burp_to_api(burp_data: Dict[str, Any]) -> Dict[str, Any]:
     """Convert Burp Suite HTTP history format to our API format"""
@@ -155,48 +155,99 @@ def convert_burp_to_api(burp_data: Dict[str, Any]) -> Dict[str, Any]:
         "original_response": response
     }
 
-@app.post("/apis/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def execute_test(api: Dict[str, Any], coalesce: bool = False) -> Dict[str, Any]:
+    """Run one API test, update its status and results, and return a summary entry"""
     try:
-        content = await file.read()
-        if not content:
-            raise HTTPException(status_code=400, detail="Empty file")
-            
-        file_content = content.decode('utf-8')
-        print(f"File content type: {type(file_content)}")
-        print(f"File content length: {len(file_content)}")
-        print(f"First 100 characters: {file_content[:100]}")
+        # Update status to running
+        catalog.set_status(api, "running")
+        
+        # Run the test
+        if coalesce and (api.get("method") or "GET").upper() in COALESCABLE_METHODS:
+            test_result, leader = await in_flight.run(api["content_hash"], lambda: api_tester.test_api(api, use_cache=True))
+        else:
+            test_result, leader = await api_tester.test_api(api, use_cache=True), True
+        # A shared response is one request: only its leader counts it
+        if leader:
+            functional_stats.record(test_result)
         
+        # Update API with test results
+        if test_result.get("error"):
+            catalog.set_status(api, "failed")
+        else:
+            catalog.set_status(api, "completed" if test_result.get("success", False) else "failed")
+        
+        api["test_results"] = test_result
+        await catalog.save_result(api, test_result)
+        
+        return {
+            "api_id": api["id"],
+            "name": api["name"],
+            "status": api["status"],
+            "result": test_result
+        }
+    except Exception as e:
+        catalog.set_status(api, "failed")
+        api["test_results"] = {
+            "error": str(e),
+            "success": False,
+            "response_time": 0,
+            "status_code": None,
+            "response_body": None
+        }
+        return {
+            "api_id": api["id"],
+            "name": api["name"],
+            "status": "failed",
+            "error": str(e)
+        }
+
+@app.post("/apis/upload")
+async def upload_file(file: UploadFile = File(...), include_responses: bool = False):
+    try:
         uploaded_apis = []
         
-        # parse as XML first
+        # Burp XML exports are parsed as a stream, one <item> at a time
         if file.filename.endswith('.xml'):
             print("Attempting to parse as XML...")
             try:
-                data = parse_burp_xml(file_content)
-                print(f"Successfully parsed XML with {len(data)} items")
-                for item in data:
-                    api = convert_burp_to_api(item)
-                    apis.append(api)
-                    uploaded_apis.append(api)
+                parser = BurpStreamParser(decode_responses=include_responses)
+                size = 0
+                while True:
+                    chunk = await file.read(BURP_CHUNK_SIZE)
+                    # Checked before close(), which would report an empty upload as a parse error
+                    if not chunk and not size:
+                        raise HTTPException(status_code=400, detail="Empty file")
+                    size += len(chunk)
+                    items = parser.feed(chunk) if chunk else parser.close()
+                    for item in items:
+                        uploaded_apis.append(convert_burp_to_api(item))
+                    if not chunk:
+                        break
+                # A well-formed export with no items is simply nothing to import
+                await catalog.add_many(uploaded_apis)
+                print(f"Successfully parsed XML with {parser.parsed} items ({parser.skipped} skipped)")
                 return {
                     "message": "XML file uploaded and parsed successfully",
-                    "apis": apis,
+                    "apis": catalog.all(),
                     "uploaded_apis": uploaded_apis,
-                    "status_summary": {
-                        "pending": len([api for api in apis if api["status"] == "pending"]),
-                        "running": len([api for api in apis if api["status"] == "running"]),
-                        "completed": len([api for api in apis if api["status"] == "completed"]),
-                        "failed": len([api for api in apis if api["status"] == "failed"])
-                    }
+                    "duplicates": sum(1 for api in uploaded_apis if api["duplicate_of"]),
+                    "status_summary": catalog.status_summary()
                 }
             except ET.ParseError as e:
                 print(f"XML parse error: {e}")
                 raise HTTPException(status_code=400, detail=f"Invalid File format: {str(e)}")
+            except HTTPException:
+                raise
             except Exception as e:
                 print(f"Error processing XML: {e}")
                 raise HTTPException(status_code=400, detail=f"Error processing XML file: {str(e)}")
         
+        content = await file.read()
+        if not content:
+            raise HTTPException(status_code=400, detail="Empty file")
+            
+        file_content = content.decode('utf-8')
+        
         # Try to parse as JSON
         try:
             data = json.loads(file_content)
@@ -216,7 +267,6 @@ async def upload_file(file: UploadFile = File(...)):
                             "status": "pending",
                             "test_results": None
                         }
-                    apis.append(api)
                     uploaded_apis.append(api)
             else:
                 if 'request' in data:  # Burp Suite format
@@ -233,396 +283,273 @@ async def upload_file(file: UploadFile = File(...)):
                         "status": "pending",
                         "test_results": None
                     }
-                apis.append(api)
                 uploaded_apis.append(api)
             
+            await catalog.add_many(uploaded_apis)
+            
             # Run tests for all uploaded APIs
-            results = []
-            for api in uploaded_apis:
-                try:
-                    # Update status to running
-                    api["status"] = "running"
-                    
-                    # Run the test
-                    test_result = await api_tester.test_api(api)
-                    
-                    # Update API with test results
-                    if test_result.get("error"):
-                        api["status"] = "failed"
-                    else:
-                        api["status"] = "completed" if test_result.get("success", False) else "failed"
-                    
-                    api["test_results"] = test_result
-                    
-                    results.append({
-                        "api_id": api["id"],
-                        "name": api["name"],
-                        "status": api["status"],
-                        "result": test_result
-                    })
-                except Exception as e:
-                    api["status"] = "failed"
-                    api["test_results"] = {
-                        "error": str(e),
-                        "success": False,
-                        "response_time": 0,
-                        "status_code": None,
-                        "response_body": None
-                    }
-                    results.append({
-                        "api_id": api["id"],
-                        "name": api["name"],
-                        "status": "failed",
-                        "error": str(e)
-                    })
+            pool_before = api_tester.pool_stats()
+            results = await scheduler.map(uploaded_apis, execute_test)
             
             return {
                 "message": "JSON file uploaded and tests completed",
-                "apis": apis,
+                "apis": catalog.all(),
                 "results": results,
-                "status_summary": {
-                    "pending": len([api for api in apis if api["status"] == "pending"]),
-                    "running": len([api for api in apis if api["status"] == "running"]),
-                    "completed": len([api for api in apis if api["status"] == "completed"]),
-                    "failed": len([api for api in apis if api["status"] == "failed"])
-                }
+                "duplicates": sum(1 for api in uploaded_apis if api["duplicate_of"]),
+                "pool": pool_delta(pool_before, api_tester.pool_stats()),
+                "status_summary": catalog.status_summary()
             }
             
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid file format. Please upload a valid XML or JSON file")
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/apis/run-all")
-async def run_all_apis():
-    """Run all APIs in parallel"""
-    results = []
+async def run_all_job(job: Job, coalesce: bool = False) -> Dict[str, Any]:
+    """Test every API that isn't already running, bounded by the scheduler"""
+    # Mark everything up front so overlapping run-all calls skip these APIs
+    pending = [api for api in catalog if api["status"] != "running"]
+    for api in pending:
+        catalog.set_status(api, "running")
+    job.total = len(pending)
     
-    # Create tasks for all APIs that are not running
-    tasks = []
-    for api in apis:
-        if api["status"] != "running":
-            # Update status to running
-            api["status"] = "running"
-            
-            # Create task for running the test
-            task = asyncio.create_task(api_tester.test_api(api))
-            tasks.append((api, task))
+    pool_before = api_tester.pool_stats()
+    try:
+        results = await scheduler.map(
+            pending, partial(execute_test, coalesce=coalesce), concurrency=scheduler.max_concurrency, on_result=lambda _: job.advance()
+        )
+    except asyncio.CancelledError:
+        # Tests that never got to run go back to pending
+        for api in pending:
+            if api["status"] == "running":
+                catalog.set_status(api, "pending")
+        raise
     
-    # Wait for all tasks to complete
-    for api, task in tasks:
-        try:
-            test_result = await task
-            
-            # Update API with test results
-            if test_result.get("error"):
-                api["status"] = "failed"
-            else:
-                api["status"] = "completed" if test_result.get("success", False) else "failed"
-            
-            api["test_results"] = test_result
-            
-            results.append({
-                "api_id": api["id"],
-                "name": api["name"],
-                "status": api["status"],
-                "result": test_result
-            })
-        except Exception as e:
-            api["status"] = "failed"
-            api["test_results"] = {
-                "error": str(e),
-                "success": False,
-                "response_time": 0,
-                "status_code": None,
-                "response_body": None
-            }
-            results.append({
-                "api_id": api["id"],
-                "name": api["name"],
-                "status": "failed",
-                "error": str(e)
+    return {
+        "results": results,
+        "pool": pool_delta(pool_before, api_tester.pool_stats()),
+        "status_summary": catalog.status_summary(),
+        "changes": change_summary(results) if api_tester.cache else None,
+    }
+
+def change_summary(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """How many responses changed since the previous run (needs the response cache).
+
+    Only results the cache tracked count as changed/unchanged/first_run;
+    non-cacheable methods and requests that got no response are "untracked".
+    """
+    counts = {"changed": 0, "unchanged": 0, "first_run": 0, "revalidated": 0, "untracked": 0}
+    for entry in results:
+        result = entry.get("result") or {}
+        if "changed" not in result or result.get("body_sha256") is None:
+            counts["untracked"] += 1
+            continue
+        if result.get("cache") == "revalidated":
+            counts["revalidated"] += 1
+        if result["changed"] is None:
+            counts["first_run"] += 1
+        else:
+            counts["changed" if result["changed"] else "unchanged"] += 1
+    return counts
+
+async def performance_job(job: Job, api: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Performance test on the load engine; see LoadTest for the open/closed models"""
+    samples = []
+
+    def on_result(result: Dict[str, Any]):
+        job.advance()
+        # Keep a bounded, body-free sample for per-request charts
+        if len(samples) < MAX_RESULT_SAMPLES:
+            samples.append({
+                "success": result.get("success", False),
+                "status_code": result.get("status_code"),
+                "response_time": result.get("response_time", 0),
+                "error": result.get("error"),
             })
+
+    test = LoadTest(
+        api_tester,
+        api,
+        users=options["concurrency"],
+        total_requests=options["num_requests"] if options["duration"] is None else None,
+        duration=options["duration"],
+        target_rps=options["target_rps"],
+        warmup_requests=options["warmup"],
+        on_result=on_result,
+    )
+    await test.run()
+    if test.status == "stopped":
+        raise asyncio.CancelledError()
+    if test.status == "failed":
+        # Partial metrics would look like a completed run
+        raise RuntimeError(test.error or "load test failed")
+    stats = test.stats()
     
     return {
-        "message": "All tests completed",
-        "results": results,
-        "apis": apis,
-        "status_summary": {
-            "pending": len([api for api in apis if api["status"] == "pending"]),
-            "running": len([api for api in apis if api["status"] == "running"]),
-            "completed": len([api for api in apis if api["status"] == "completed"]),
-            "failed": len([api for api in apis if api["status"] == "failed"])
-        }
+        "metrics": {**test.run_stats.summary(), "service_time": stats["service_time"]},
+        "pool": stats["pool"],
+        "results": samples
     }
 
-@app.post("/apis/{api_id}/performance")
-async def run_performance_test(api_id: str, num_requests: int = 10):
-    """Run performance test for a specific API"""
-    api = next((a for a in apis if a["id"] == api_id), None)
+def submit_run_all(coalesce: bool = False) -> Job:
+    job = Job("run-all", total=len(catalog), params={"coalesce": coalesce})
+    return jobs.submit(job, partial(run_all_job, coalesce=coalesce))
+
+def submit_performance(api_id: str, options: Dict[str, Any]) -> Job:
+    api = catalog.get(api_id)
     if not api:
         raise HTTPException(status_code=404, detail="API not found")
+    if options["duration"] is not None:
+        # Progress against the number of requests the schedule implies; a
+        # closed-model run bound only by time has no known total
+        total = int(options["duration"] * options["target_rps"]) if options["target_rps"] else None
+    else:
+        total = options["num_requests"]
+    job = Job("performance", total=total, params={"api_id": api_id, **options})
+    return jobs.submit(job, lambda job: performance_job(job, api, options))
+
+@app.post("/apis/run-all")
+async def run_all_apis(background: bool = False, coalesce: bool = False):
+    """Run all APIs in parallel; with background=true return the job right away.
+
+    coalesce=true lets duplicate GET/HEAD/OPTIONS APIs (same content hash) in flight
+    at the same time share one upstream request.
+    """
+    job = submit_run_all(coalesce)
+    if background:
+        return JSONResponse(job.to_dict(), status_code=202)
+    result = await job.wait()
+    if job.status != "completed":
+        raise HTTPException(status_code=500, detail=f"Run-all {job.status}: {job.error or ''}")
     
-    results = []
-    for _ in range(num_requests):
-        result = await api_tester.test_api(api)
-        results.append(result)
-    
-    # Calculate performance metrics
-    response_times = [r["response_time"] for r in results]
-    success_count = sum(1 for r in results if r["success"])
-    
-    metrics = {
-        "avg_response_time": sum(response_times) / len(response_times),
-        "min_response_time": min(response_times),
-        "max_response_time": max(response_times),
-        "success_rate": (success_count / num_requests) * 100,
-        "total_requests": num_requests,
-        "successful_requests": success_count
+    return {
+        "message": "All tests completed",
+        **result,
+        "apis": catalog.all(),
     }
+
+@app.post("/apis/{api_id}/performance")
+async def run_performance_test(
+    api_id: str,
+    num_requests: int = 10,
+    concurrency: int = 1,
+    target_rps: Optional[float] = None,
+    warmup: int = 0,
+    duration: Optional[float] = None,
+    background: bool = False,
+):
+    """Run performance test for a specific API.
+
+    concurrency sets parallel virtual users (or the in-flight cap when
+    target_rps is given, which switches to a constant arrival rate); warmup
+    requests are excluded from the stats; duration (seconds) replaces
+    num_requests. With background=true the job is returned right away.
+    """
+    if num_requests < 1 or concurrency < 1 or warmup < 0:
+        raise HTTPException(status_code=400, detail="num_requests and concurrency must be positive")
+    if (target_rps is not None and target_rps <= 0) or (duration is not None and duration <= 0):
+        raise HTTPException(status_code=400, detail="target_rps and duration must be positive")
+    job = submit_performance(api_id, {
+        "num_requests": num_requests,
+        "concurrency": concurrency,
+        "target_rps": target_rps,
+        "warmup": warmup,
+        "duration": duration,
+    })
+    if background:
+        return JSONResponse(job.to_dict(), status_code=202)
+    result = await job.wait()
+    if job.status != "completed":
+        raise HTTPException(status_code=500, detail=f"Performance test {job.status}: {job.error or ''}")
     
     return {
         "message": "Performance test completed",
-        "metrics": metrics,
-        "results": results
+        **result
     }
 
+@app.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in jobs.list()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.finished:
+        return JSONResponse(job.to_dict(), status_code=202)
+    return {**job.to_dict(), "result": job.result}
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not jobs.cancel(job_id):
+        return {"status": job.status, "message": "Job already finished"}
+    return {"status": "cancelling", "job_id": job_id}
+
 @app.get("/apis/report")
-async def view_test_report():
+async def view_test_report(request: Request):
+    etag = f'W/"report-{ETAG_EPOCH}-{catalog.version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     try:
-        # Generate HTML content with fixed CSS
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang='en'>
-        <head>
-            <meta charset='UTF-8'>
-            <meta name='viewport' content='width=device-width, initial-scale=1.0'>
-            <title>API Test Report</title>
-            <link href='https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap' rel='stylesheet'>
-            <style>
-                :root {{
-                    --bg-main: #181a20;
-                    --bg-card: #23262f;
-                    --bg-header: linear-gradient(90deg, #6366f1 0%, #60a5fa 100%);
-                    --text-main: #f3f4f6;
-                    --text-secondary: #a1a1aa;
-                    --accent: #6366f1;
-                    --accent2: #60a5fa;
-                    --success: #22d3ee;
-                    --fail: #f87171;
-                    --pending: #fbbf24;
-                    --running: #38bdf8;
-                }}
-                body {{
-                    font-family: 'Roboto', Arial, sans-serif;
-                    margin: 0;
-                    background: var(--bg-main);
-                    color: var(--text-main);
-                }}
-                .container {{
-                    max-width: 900px;
-                    margin: 40px auto;
-                    background: var(--bg-card);
-                    border-radius: 18px;
-                    box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.18);
-                    padding: 40px 32px 32px 32px;
-                }}
-                .header {{
-                    background: var(--bg-header);
-                    color: #fff;
-                    border-radius: 12px;
-                    padding: 32px 24px 24px 24px;
-                    box-shadow: 0 4px 16px 0 rgba(99, 102, 241, 0.12);
-                    margin-bottom: 32px;
-                    text-align: center;
-                }}
-                .header h1 {{
-                    margin: 0 0 8px 0;
-                    font-size: 2.5rem;
-                    font-weight: 700;
-                    letter-spacing: 1px;
-                }}
-                .header p {{
-                    margin: 0;
-                    font-size: 1.1rem;
-                    opacity: 0.95;
-                }}
-                .summary-table {{
-                    width: 100%;
-                    border-collapse: separate;
-                    border-spacing: 0 8px;
-                    margin-bottom: 32px;
-                }}
-                .summary-table th, .summary-table td {{
-                    padding: 12px 18px;
-                    background: #23262f;
-                    border-radius: 8px;
-                    font-size: 1.1rem;
-                    color: var(--text-main);
-                }}
-                .summary-table th {{
-                    background: var(--accent);
-                    color: #fff;
-                    font-weight: 700;
-                }}
-                .badge {{
-                    display: inline-block;
-                    padding: 4px 14px;
-                    border-radius: 999px;
-                    font-size: 0.95rem;
-                    font-weight: 700;
-                    letter-spacing: 0.5px;
-                }}
-                .badge-success {{ background: #134e4a; color: var(--success); border: 1px solid var(--success); }}
-                .badge-failed {{ background: #7f1d1d; color: var(--fail); border: 1px solid var(--fail); }}
-                .badge-running {{ background: #0e7490; color: var(--running); border: 1px solid var(--running); }}
-                .badge-pending {{ background: #78350f; color: var(--pending); border: 1px solid var(--pending); }}
-                .api-card {{
-                    background: #23262f;
-                    border-radius: 14px;
-                    box-shadow: 0 2px 8px 0 rgba(99, 102, 241, 0.07);
-                    margin-bottom: 28px;
-                    padding: 28px 24px 20px 24px;
-                    transition: box-shadow 0.2s;
-                    border: 1px solid #262a35;
-                }}
-                .api-card:hover {{
-                    box-shadow: 0 6px 24px 0 rgba(99, 102, 241, 0.13);
-                }}
-                .api-title {{
-                    font-size: 1.3rem;
-                    font-weight: 700;
-                    color: var(--accent2);
-                    margin-bottom: 6px;
-                }}
-                .api-meta {{
-                    font-size: 1rem;
-                    color: var(--text-secondary);
-                    margin-bottom: 10px;
-                }}
-                .api-status {{
-                    margin-bottom: 12px;
-                }}
-                .test-results-table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-top: 10px;
-                }}
-                .test-results-table th, .test-results-table td {{
-                    padding: 10px 12px;
-                    border-bottom: 1px solid #353945;
-                    font-size: 1rem;
-                }}
-                .test-results-table th {{
-                    background: #232262;
-                    color: var(--accent2);
-                    font-weight: 700;
-                }}
-                .test-results-table td {{
-                    background: #181a20;
-                    color: var(--text-main);
-                }}
-                h2 {{
-                    color: var(--accent2);
-                    margin-bottom: 18px;
-                    font-size: 1.5rem;
-                    font-weight: 700;
-                }}
-                @media (max-width: 600px) {{
-                    .container {{ padding: 10px; }}
-                    .header {{ padding: 18px 8px; }}
-                    .api-card {{ padding: 14px 8px; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>API Test Report</h1>
-                    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                </div>
-                <table class="summary-table">
-                    <tr>
-                        <th>Total APIs</th>
-                        <th>Completed</th>
-                        <th>Failed</th>
-                        <th>Running</th>
-                        <th>Pending</th>
-                    </tr>
-                    <tr>
-                        <td>{len(apis)}</td>
-                        <td><span class="badge badge-success">{len([api for api in apis if api['status'] == 'completed'])}</span></td>
-                        <td><span class="badge badge-failed">{len([api for api in apis if api['status'] == 'failed'])}</span></td>
-                        <td><span class="badge badge-running">{len([api for api in apis if api['status'] == 'running'])}</span></td>
-                        <td><span class="badge badge-pending">{len([api for api in apis if api['status'] == 'pending'])}</span></td>
-                    </tr>
-                </table>
-                <div class="details">
-                    <h2>API Details</h2>
-                    {''.join(f"""
-                    <div class='api-card'>
-                        <div class='api-title'>{api['name']}</div>
-                        <div class='api-meta'><b>URL:</b> {api['url']} &nbsp; | &nbsp; <b>Method:</b> {api['method']}</div>
-                        <div class='api-status'>
-                            <span class='badge badge-{api['status']}'>{api['status'].capitalize()}</span>
-                        </div>
-                        {f'''
-                        <div class="test-results">
-                            <h4 style="color:var(--accent2); margin-bottom:8px;">Test Results</h4>
-                            <table class="test-results-table">
-                                <tr>
-                                    <th>Status Code</th>
-                                    <th>Response Time</th>
-                                    <th>Success</th>
-                                </tr>
-                                <tr>
-                                    <td>{api['test_results'].get('status_code', 'N/A')}</td>
-                                    <td>{api['test_results'].get('response_time', 'N/A')} ms</td>
-                                    <td><span class="badge {('badge-success' if api['test_results'].get('success') else 'badge-failed')}">{'Yes' if api['test_results'].get('success') else 'No'}</span></td>
-                                </tr>
-                            </table>
-                        </div>
-                        ''' if api.get('test_results') else ''}
-                    </div>
-                    """ for api in apis)}
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        # Return HTML for direct viewing
-        return Response(
-            content=html_content,
-            media_type="text/html"
-        )
+        # Only worth drawing once some functional tests have run
+        chart_url = "/apis/report/chart" if functional_stats.total else None
+        chunks = report_renderer.render(catalog, chart_url)
     except Exception as e:
         print(f"Error generating report: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate report: {str(e)}"
         )
+    return StreamingResponse(chunks, media_type="text/html", headers={"ETag": etag})
+
+@app.get("/apis/report/chart")
+async def report_chart():
+    """Percentiles of all functional test response times, as PNG"""
+    spec = {
+        "kind": "bar",
+        "title": f"Functional test response times ({functional_stats.total} requests)",
+        "ylabel": "ms",
+        "series": functional_stats.histogram.percentiles(),
+    }
+    png = await charts.render(("report", catalog.version, functional_stats.total), spec)
+    return Response(content=png, media_type="image/png")
 
 @app.post("/apis/{api_id}/run")
 async def run_api_test(api_id: str):
     """Run a test for a specific API"""
     # Find the API
-    api = next((a for a in apis if a["id"] == api_id), None)
+    api = catalog.get(api_id)
     if not api:
         raise HTTPException(status_code=404, detail="API not found")
     
     try:
         # Update status to running
-        api["status"] = "running"
+        catalog.set_status(api, "running")
         
         # Run the test
-        test_result = await api_tester.test_api(api)
+        test_result = await api_tester.test_api(api, use_cache=True)
+        functional_stats.record(test_result)
         
         # Update API with test results
         if test_result.get("error"):
-            api["status"] = "failed"
+            catalog.set_status(api, "failed")
             api["test_results"] = test_result
+            await catalog.save_result(api, test_result)
             return {
                 "message": "Test failed",
                 "api": api,
@@ -630,8 +557,9 @@ async def run_api_test(api_id: str):
             }
         
         # Update status based on test result
-        api["status"] = "completed" if test_result.get("success", False) else "failed"
+        catalog.set_status(api, "completed" if test_result.get("success", False) else "failed")
         api["test_results"] = test_result
+        await catalog.save_result(api, test_result)
         
         return {
             "message": "Test completed",
@@ -640,7 +568,7 @@ async def run_api_test(api_id: str):
         }
     except Exception as e:
         # Update status to failed if there's an error
-        api["status"] = "failed"
+        catalog.set_status(api, "failed")
         api["test_results"] = {
             "error": str(e),
             "success": False,
@@ -654,153 +582,446 @@ async def run_api_test(api_id: str):
             "result": api["test_results"]
         }
 
+def list_etag(request: Request) -> str:
+    """ETag for a listing: changes whenever the catalog or the query does"""
+    query = hashlib.sha1(str(request.url.query).encode()).hexdigest()[:12]
+    return f'W/"{ETAG_EPOCH}-{catalog.version}-{query}"'
+
+def project_api(api: Dict[str, Any], fields: Optional[List[str]], include_bodies: bool) -> Dict[str, Any]:
+    """Copy of an API limited to `fields`, optionally without the bulky bodies"""
+    projected = {k: api[k] for k in fields if k in api} if fields else dict(api)
+    if not include_bodies:
+        for field in BODY_FIELDS:
+            projected.pop(field, None)
+        if projected.get("test_results"):
+            projected["test_results"] = {k: v for k, v in projected["test_results"].items() if k != "response_body"}
+    return projected
+
+def list_apis(status, method, host, q, cursor, limit, fields, include_bodies, unique=False):
+    try:
+        start = decode_cursor(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page, next_position = catalog.page(start, limit, status=status, method=method, host=host, name=q, unique=unique)
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    if field_list is None and include_bodies:
+        apis = page
+    else:
+        apis = [project_api(api, field_list, include_bodies) for api in page]
+    return apis, encode_cursor(next_position) if next_position is not None else None
+
 @app.get("/apis")
-async def get_apis():
-    """Get all APIs with their current status and test results"""
+async def get_apis(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    method: Optional[str] = None,
+    host: Optional[str] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    include_bodies: bool = True,
+    unique: bool = False,
+):
+    """Get APIs with their current status and test results.
+
+    Supports cursor pagination (limit/cursor), filters (status, method, host,
+    q for a name substring, unique to hide duplicates), field projection and
+    If-None-Match.
+    """
+    etag = list_etag(request)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     try:
+        apis, next_cursor = list_apis(status, method, host, q, cursor, limit, fields, include_bodies, unique)
+        response.headers["ETag"] = etag
         # Return a structured response with metadata
         return {
-            "total": len(apis),
+            "total": len(catalog),
+            "duplicates": catalog.duplicate_count,
+            "count": len(apis),
+            "next_cursor": next_cursor,
             "apis": apis,
-            "status_summary": {
-                "pending": len([api for api in apis if api["status"] == "pending"]),
-                "running": len([api for api in apis if api["status"] == "running"]),
-                "completed": len([api for api in apis if api["status"] == "completed"]),
-                "failed": len([api for api in apis if api["status"] == "failed"])
-            }
+            "status_summary": catalog.status_summary()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving APIs: {str(e)}")
 
+@app.get("/apis/summary")
+async def get_api_summary():
+    """Status counts overall and broken down by host and method"""
+    return catalog.breakdown()
+
+@app.get("/apis/stats")
+async def get_api_stats():
+    """Latency percentiles and error counts over all functional test runs"""
+    summary = functional_stats.summary()
+    summary["cache"] = api_tester.cache.stats() if api_tester.cache else None
+    return summary
+
 @app.get("/apis/{api_id}")
 async def get_api(api_id: str):
-    api = next((a for a in apis if a["id"] == api_id), None)
+    api = catalog.get(api_id)
     if not api:
         raise HTTPException(status_code=404, detail="API not found")
     return api
 
 @app.get("/test-results")
-async def get_test_results():
+async def get_test_results(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    method: Optional[str] = None,
+    host: Optional[str] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    include_bodies: bool = True,
+    unique: bool = False,
+):
+    etag = list_etag(request)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    apis, next_cursor = list_apis(status, method, host, q, cursor, limit, fields, include_bodies, unique)
+    response.headers["ETag"] = etag
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return apis
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    await api_tester.close()
+def parse_topics(topics: Optional[str]) -> Optional[List[str]]:
+    return [t.strip() for t in topics.split(",") if t.strip()] if topics else None
+
+@app.websocket("/ws/events")
+async def events_websocket(websocket: WebSocket, topics: Optional[str] = None):
+    """Push api/summary/loadtest events; each message is {"events": [...]}"""
+    await websocket.accept()
+    subscription = events.subscribe(parse_topics(topics))
+
+    async def wait_for_disconnect():
+        # Client messages are ignored; we only care about the socket closing
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    try:
+        while True:
+            next_batch = asyncio.create_task(subscription.next_batch(timeout=EVENT_HEARTBEAT_SECONDS))
+            await asyncio.wait({next_batch, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_batch.cancel()
+                break
+            await websocket.send_json({"events": next_batch.result() or [{"type": "heartbeat"}]})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        disconnected.cancel()
+        events.unsubscribe(subscription)
+
+@app.get("/events")
+async def events_stream(request: Request, topics: Optional[str] = None):
+    """Server-sent events version of /ws/events"""
+    subscription = events.subscribe(parse_topics(topics))
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(timeout=EVENT_HEARTBEAT_SECONDS)
+                if not batch:
+                    yield ": keep-alive\n\n"
+                for event in batch:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            events.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to API Testing Automation Platform"}
 
-import json
-from urllib.parse import urlparse
-
-def write_locustfile(api_url, method, headers, body):
-    parsed_url = urlparse(api_url)
-    relative_path = parsed_url.path or "/"
-    if parsed_url.query:
-        relative_path += "?" + parsed_url.query
-
-    with open("locustfile.py", "w") as f:
-        f.write(f"""
-from locust import HttpUser, task, between
-
-class WebsiteUser(HttpUser):
-    wait_time = between(0.5, 1.5)
-
-    @task
-    def my_task(self):
-        self.client.request(
-            "{method.upper()}",
-            "{relative_path}",
-            headers={json.dumps(headers)},
-            data={json.dumps(body) if body else 'None'}
-        )
-""")
-
-from urllib.parse import urlparse
-import subprocess
-
-def run_locust(api_url, method, users, total_requests, headers, body):
-    write_locustfile(api_url, method, headers, body)
-
-    # ✅ Extract the host for Locust
-    parsed_url = urlparse(api_url)
-    host = f"{parsed_url.scheme}://{parsed_url.netloc}"  # example: https://example.com
-
-    cmd = [
-        "locust",
-        "-f", "locustfile.py",
-        "--headless",
-        "-u", str(users),
-        "-r", str(users),
-        "--run-time", "10m",        # ⬅️ You can change based on total_requests
-        "--host", host,             # ✅ ADD THIS -- critical fix
-        "--csv", "loadtest_stats",
-        "--csv-full-history"
-    ]
-
-    subprocess.Popen(cmd)
-
-    global loadtest_process, loadtest_running
-    loadtest_running = True
-    loadtest_process = subprocess.Popen(cmd)
-    loadtest_process.wait()
-    loadtest_running = False
+def get_loadtest(test_id: Optional[str] = None) -> Optional[Union[LoadTest, ArchivedLoadTest]]:
+    """Look up a load test by id, defaulting to the most recently started one"""
+    test_id = test_id or latest_loadtest_id
+    if not test_id:
+        return None
+    test = loadtests.get(test_id)
+    if test is not None:
+        return test
+    try:
+        # Ids name directories, so only accept real ones
+        uuid.UUID(test_id)
+    except ValueError:
+        return None
+    return ArchivedLoadTest.load(test_id, ColumnarHistory(os.path.join(LOADTEST_HISTORY_DIR, test_id)))
+
+def evict_loadtests():
+    """Archive the oldest finished tests beyond MAX_FINISHED_LOADTESTS"""
+    finished = [test for test in loadtests.values() if test.status not in ("pending", "running")]
+    for test in finished[:max(0, len(finished) - MAX_FINISHED_LOADTESTS)]:
+        ArchivedLoadTest.archive(test)
+        del loadtests[test.id]
+
+def publish_loadtest(test: LoadTest):
+    # stats() is not free; skip it when nobody is listening
+    if not events.subscriber_count:
+        return
+    events.publish("loadtest", test.id, test.stats())
+
+def int_option(data: Dict[str, Any], name: str, default: int, minimum: int) -> int:
+    """An integer field of a JSON request body, as a 400 if it is invalid"""
+    value = data.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise HTTPException(status_code=400, detail=f"{name} must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an integer")
+    if value < minimum:
+        raise HTTPException(status_code=400, detail=f"{name} must be at least {minimum}")
+    return value
 
 @app.post("/loadtest/start")
-async def start_loadtest(request: Request, background_tasks: BackgroundTasks):
+async def start_loadtest(request: Request):
+    global latest_loadtest_id
     data = await request.json()
-    api_url = data["url"]
-    method = data.get("method", "GET")
-    users = int(data.get("concurrent_users", 1))
-    total_requests = int(data.get("total_requests", 10))
-    headers = data.get("headers", {})
-    body = data.get("body", None)
-    background_tasks.add_task(run_locust, api_url, method, users, total_requests, headers, body)
-    return {"status": "started"}
+    api = {
+        "url": data["url"],
+        "method": data.get("method", "GET"),
+        "headers": data.get("headers", {}),
+        "body": data.get("body", None),
+        "query_params": data.get("query_params", {}),
+    }
+    duration = data.get("duration")
+    total_requests = data.get("total_requests")
+    if total_requests is None and duration is None:
+        total_requests = 10
+    target_rps = data.get("target_rps")
+    # More than one process shards the virtual users across worker processes;
+    # agent_count does the same across registered remote agents
+    processes = int_option(data, "processes", 1, minimum=1)
+    agent_count = int_option(data, "agents", 0, minimum=0)
+    if (processes > 1 or agent_count) and data.get("record_results"):
+        raise HTTPException(status_code=400, detail="record_results is only supported for single-process tests")
+    idle_agents = agents.idle()
+    if agent_count > len(idle_agents):
+        raise HTTPException(status_code=409, detail=f"{agent_count} agents requested, {len(idle_agents)} idle")
+
+    # {{placeholders}} filled from a data file and/or values extracted from responses
+    scenario = None
+    if data.get("data") or data.get("extract") or data.get("setup"):
+        try:
+            scenario = Scenario(
+                {"api": api, "data": data.get("data"), "extract": data.get("extract"), "setup": data.get("setup")},
+                data_dir=LOADTEST_DATA_DIR,
+            )
+            scenario.validate()
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scenario: {e}")
+        if agent_count and scenario.uses_data:
+            raise HTTPException(status_code=400, detail="Data files are not available to remote agents")
+
+    options = dict(
+        users=int_option(data, "concurrent_users", 1, minimum=1),
+        total_requests=int(total_requests) if total_requests is not None else None,
+        duration=float(duration) if duration is not None else None,
+        target_rps=float(target_rps) if target_rps else None,
+        warmup_requests=int_option(data, "warmup_requests", 0, minimum=0),
+        on_snapshot=publish_loadtest,
+        scenario=scenario,
+    )
+    try:
+        if agent_count:
+            test = DistributedLoadTest(api_tester, api, agents=idle_agents[:agent_count], **options)
+        elif processes > 1:
+            test = ShardedLoadTest(api_tester, api, processes=processes, **options)
+        else:
+            test = LoadTest(
+                api_tester,
+                api,
+                result_writer=catalog.writer if data.get("record_results") else None,
+                api_id=data.get("api_id"),
+                **options,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    test.history_store = ColumnarHistory(os.path.join(LOADTEST_HISTORY_DIR, test.id))
+    evict_loadtests()
+    loadtests[test.id] = test
+    latest_loadtest_id = test.id
+    test.start()
+    return {"status": "started", "test_id": test.id}
+
+@app.post("/loadtest/data")
+async def upload_loadtest_data(file: UploadFile = File(...)):
+    """Store a CSV / JSON / JSON Lines file for {"data": {"file": name}}"""
+    name = os.path.basename(file.filename or "")
+    if not name.endswith(DATA_FORMATS):
+        raise HTTPException(status_code=400, detail=f"Data files must be one of {', '.join(DATA_FORMATS)}")
+    os.makedirs(LOADTEST_DATA_DIR, exist_ok=True)
+    try:
+        path = resolve_data_file(LOADTEST_DATA_DIR, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    size = 0
+    # Copied in chunks, so large datasets never sit in memory
+    with open(path, "wb") as f:
+        while True:
+            chunk = await file.read(DATA_UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            size += len(chunk)
+    return {"file": name, "size": size}
+
+@app.get("/loadtest/data")
+async def list_loadtest_data():
+    if not os.path.isdir(LOADTEST_DATA_DIR):
+        return {"files": []}
+    return {"files": [
+        {"file": name, "size": os.path.getsize(os.path.join(LOADTEST_DATA_DIR, name))}
+        for name in sorted(os.listdir(LOADTEST_DATA_DIR)) if name.endswith(DATA_FORMATS)
+    ]}
 
 @app.post("/loadtest/stop")
-async def stop_loadtest():
-    global loadtest_process, loadtest_running
-    if loadtest_process and loadtest_running:
-        loadtest_process.terminate()
-        loadtest_running = False
-        return {"status": "stopped"}
+async def stop_loadtest(test_id: Optional[str] = None):
+    test = get_loadtest(test_id)
+    if test and test.running:
+        test.stop()
+        return {"status": "stopped", "test_id": test.id}
     return {"status": "no test running"}
 
 @app.get("/loadtest/status")
-async def loadtest_status():
-    # Read stats from CSV (or use Locust's REST API if running in distributed mode)
-    try:
-        with open("loadtest_stats_stats_history.csv") as f:
-            lines = f.readlines()
-            if len(lines) > 1:
-                last = lines[-1].strip().split(",")
-                return {
-                    "requests_per_second": last[2],
-                    "avg_response_time": last[5],
-                    "min_response_time": last[6],
-                    "max_response_time": last[7],
-                    "failures": last[4],
-                    "total_requests": last[1],
-                }
-    except Exception:
-        pass
-    return {}
+async def loadtest_status(test_id: Optional[str] = None):
+    test = get_loadtest(test_id)
+    if not test:
+        return {}
+    return test.stats()
 
 @app.get("/loadtest/report")
-async def loadtest_report(format: str = "json"):
-    # Return the final CSV or JSON report
+async def loadtest_report(
+    format: str = "json",
+    test_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+):
+    """Per-second snapshots with elapsed seconds in [start, end]"""
+    test = get_loadtest(test_id)
+    if not test:
+        raise HTTPException(status_code=404, detail="Load test not found")
     if format == "csv":
-        with open("loadtest_stats_stats_history.csv", "rb") as f:
-            return StreamingResponse(f, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=loadtest_report.csv"})
+        def rows():
+            columns = None
+            for snapshot in test.full_history(start, end):
+                if columns is None:
+                    columns = list(snapshot.keys())
+                    yield ",".join(columns) + "\n"
+                yield ",".join(str(snapshot[c]) for c in columns) + "\n"
+        return StreamingResponse(rows(), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=loadtest_report.csv"})
+
+    def items():
+        separator = "["
+        for snapshot in test.full_history(start, end):
+            yield separator + json.dumps(snapshot)
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+    return StreamingResponse(items(), media_type="application/json")
+
+@app.get("/loadtest/history")
+async def loadtest_history(
+    test_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    max_points: int = 500,
+    columns: Optional[str] = None,
+):
+    """Chart-ready history: each requested column as min/max/avg per bucket"""
+    test = get_loadtest(test_id)
+    if not test:
+        raise HTTPException(status_code=404, detail="Load test not found")
+    requested = [c for c in columns.split(",") if c] if columns else list(HISTORY_COLUMNS)
+    unknown = set(requested) - set(HISTORY_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(sorted(unknown))}")
+    selected = test.history_columns(["timestamp", "elapsed", *requested], start, end)
+    return {"test_id": test.id, **downsample(selected, min(max(max_points, 1), MAX_HISTORY_POINTS))}
+
+LOADTEST_CHARTS = {
+    # kind: (title, y label, columns, per-bucket reduction)
+    "latency": ("Response time percentiles per second", "ms", ("p50", "p95", "p99"), "max"),
+    "rps": ("Requests per second", "req/s", ("requests_per_second", "failures_per_second"), "avg"),
+}
+
+@app.get("/loadtest/chart")
+async def loadtest_chart(kind: str = "latency", test_id: Optional[str] = None):
+    """latency/rps over time, or the run's overall percentiles, as PNG"""
+    test = get_loadtest(test_id)
+    if not test:
+        raise HTTPException(status_code=404, detail="Load test not found")
+    stats = test.stats()
+    if kind == "percentiles":
+        spec = {
+            "kind": "bar",
+            "title": "Response time percentiles (whole run)",
+            "ylabel": "ms",
+            "series": stats["percentiles"],
+        }
+    elif kind in LOADTEST_CHARTS:
+        title, ylabel, columns, reduction = LOADTEST_CHARTS[kind]
+        data = downsample(test.history_columns(["elapsed", *columns]), CHART_POINTS)
+        spec = {
+            "kind": "line",
+            "title": title,
+            "xlabel": "elapsed (s)",
+            "ylabel": ylabel,
+            "x": data["elapsed"],
+            "series": {column: data["series"][column][reduction] for column in columns},
+        }
     else:
-        # Parse CSV to JSON
-        import csv
-        with open("loadtest_stats_stats_history.csv") as f:
-            reader = csv.DictReader(f)
-            data = list(reader)
-        return JSONResponse(data)
+        raise HTTPException(status_code=400, detail=f"Unknown chart kind: {kind}")
+    # A finished run's charts never change; a running one's change every snapshot
+    png = await charts.render((test.id, kind, test.status, stats["total_requests"]), spec)
+    return Response(content=png, media_type="image/png")
+
+@app.post("/agents/register")
+async def register_agent(request: Request):
+    data = await request.json() if await request.body() else {}
+    agent = agents.register(data.get("name"), data.get("info"))
+    print(f"Load agent {agent.name} registered")
+    return {"agent_id": agent.id, "poll_seconds": AGENT_POLL_SECONDS}
+
+@app.get("/agents")
+async def list_agents():
+    return [agent.to_dict() for agent in agents.list()]
+
+def get_agent(agent_id: str):
+    agent = agents.get(agent_id)
+    if agent is None:
+        # Unknown ids (e.g. after a coordinator restart) must re-register
+        raise HTTPException(status_code=404, detail="Agent not registered")
+    return agent
+
+@app.get("/agents/{agent_id}/plan")
+async def agent_plan(agent_id: str, wait: float = AGENT_POLL_SECONDS):
+    """Long-poll for a shard assignment; 204 when there is none yet"""
+    agent = get_agent(agent_id)
+    assignment = await agent.next_assignment(min(wait, AGENT_POLL_SECONDS))
+    if assignment is None:
+        return Response(status_code=204)
+    return assignment
+
+@app.post("/agents/{agent_id}/report")
+async def agent_report(agent_id: str, request: Request):
+    """Started/delta/done messages from an agent's running shard"""
+    agent = get_agent(agent_id)
+    data = await request.json()
+    return {"stop": agents.report(agent, data.get("messages", []))}
 
 if __name__ == "__main__":
     import uvicorn
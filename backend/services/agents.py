@@ -0,0 +1,170 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from services.api_tester import ApiTester
+from services.load_workers import ShardedLoadTest
+
+# An agent that hasn't polled or reported for this long is considered gone
+AGENT_TIMEOUT = 30.0
+
+# How long to wait for agents to flush their last delta after a stop
+STOP_GRACE_SECONDS = 10.0
+
+
+class Agent:
+    """A registered load_agent.py process that can run one shard at a time"""
+
+    def __init__(self, name: Optional[str] = None, info: Optional[Dict[str, Any]] = None):
+        self.id = str(uuid.uuid4())
+        self.name = name or self.id[:8]
+        self.info = info or {}
+        self.registered_at = time.time()
+        self.last_seen = time.monotonic()
+        self.test: Optional["DistributedLoadTest"] = None
+        self.assignment: Optional[Dict[str, Any]] = None
+        self._assigned = asyncio.Event()
+
+    @property
+    def alive(self) -> bool:
+        return time.monotonic() - self.last_seen < AGENT_TIMEOUT
+
+    @property
+    def busy(self) -> bool:
+        return self.test is not None
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def assign(self, test: "DistributedLoadTest", assignment: Dict[str, Any]):
+        self.test = test
+        self.assignment = assignment
+        self._assigned.set()
+
+    def release(self):
+        self.test = None
+        self.assignment = None
+        self._assigned.clear()
+
+    async def next_assignment(self, wait: float) -> Optional[Dict[str, Any]]:
+        """Long-poll for work; hands each assignment out once"""
+        self.touch()
+        try:
+            await asyncio.wait_for(self._assigned.wait(), wait)
+        except asyncio.TimeoutError:
+            return None
+        self._assigned.clear()
+        self.touch()
+        return self.assignment
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.id,
+            "name": self.name,
+            "info": self.info,
+            "registered_at": self.registered_at,
+            "seconds_since_seen": time.monotonic() - self.last_seen,
+            "alive": self.alive,
+            "test_id": self.test.id if self.test else None,
+        }
+
+
+class AgentRegistry:
+    """Worker agents known to this coordinator"""
+
+    def __init__(self):
+        self._agents: Dict[str, Agent] = {}
+
+    def register(self, name: Optional[str] = None, info: Optional[Dict[str, Any]] = None) -> Agent:
+        self._prune()
+        agent = Agent(name, info)
+        self._agents[agent.id] = agent
+        return agent
+
+    def _prune(self):
+        for agent in [a for a in self._agents.values() if not a.alive and not a.busy]:
+            del self._agents[agent.id]
+
+    def get(self, agent_id: str) -> Optional[Agent]:
+        return self._agents.get(agent_id)
+
+    def list(self) -> List[Agent]:
+        return list(self._agents.values())
+
+    def idle(self) -> List[Agent]:
+        return [agent for agent in self._agents.values() if agent.alive and not agent.busy]
+
+    def report(self, agent: Agent, messages: List[List[Any]]) -> bool:
+        """Deliver an agent's messages to its test; True tells it to stop"""
+        agent.touch()
+        test = agent.test
+        if test is None:
+            return True
+        for kind, shard, payload in messages:
+            test.deliver(kind, shard, payload)
+        return test.stopping
+
+
+class DistributedLoadTest(ShardedLoadTest):
+    """ShardedLoadTest whose shards run on registered agents instead of
+    local processes. Agents long-poll for their shard's plan and post the
+    same started/delta/done messages a local worker would."""
+
+    def __init__(self, api_tester: ApiTester, api: Dict[str, Any], agents: List[Agent], **kwargs):
+        super().__init__(api_tester, api, processes=1, **kwargs)
+        self.agents = agents[:self.users]
+        self.processes = len(self.agents)
+        self.stopping = False
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    def deliver(self, kind: str, shard: int, payload: Optional[Dict[str, Any]]):
+        self._inbox.put_nowait((kind, shard, payload))
+
+    async def run(self):
+        pending = set(range(len(self.agents)))
+        self.status = "running"
+        try:
+            for shard, (agent, plan) in enumerate(zip(self.agents, self._plans())):
+                agent.assign(self, {
+                    "test_id": self.id,
+                    "shard": shard,
+                    "plan": plan,
+                    "options": self.api_tester.options,
+                })
+            await self._collect(pending)
+            self.status = "failed" if self._shard_errors else "completed"
+            self.error = "; ".join(self._shard_errors) or None
+        except asyncio.CancelledError:
+            self.stopping = True
+            try:
+                await asyncio.wait_for(self._collect(pending), STOP_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.status = "stopped"
+        except Exception as e:
+            print(f"Load test {self.id} failed: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.stopping = True
+            for agent in self.agents:
+                agent.release()
+            self._finish()
+
+    async def _collect(self, pending: set):
+        while pending:
+            try:
+                kind, shard, payload = await asyncio.wait_for(self._inbox.get(), 1.0)
+            except asyncio.TimeoutError:
+                for shard in list(pending):
+                    agent = self.agents[shard]
+                    if not agent.alive:
+                        self._handle("done", shard, {"status": "failed", "error": f"agent {agent.name} stopped responding"}, pending)
+                continue
+            self._handle(kind, shard, payload, pending)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["agents"] = [agent.name for agent in self.agents]
+        return stats
@@ -1,87 +1,396 @@
 import httpx
 import json
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, Union
 import asyncio
-from datetime import datetime
+import hashlib
+import time
+from urllib.parse import urlparse
+
+from services.http_cache import ResponseCache
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PoolMetrics:
+    """Connection pool counters collected by ApiTester"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.pool_waits = 0
+        self.pool_timeouts = 0
+        self.peak_in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "pool_waits": self.pool_waits,
+            "pool_timeouts": self.pool_timeouts,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+class PhaseTimer:
+    """Collects perf_counter_ns marks from httpcore trace events for one request.
+
+    httpcore resolves DNS inside connect_tcp, so the connect phase includes it.
+    """
 
-class ApiTester:
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
-    
-    async def test_api(self, api: Dict[str, Any]) -> Dict[str, Any]:
-        """Test an API endpoint"""
-        start_time = datetime.now()
-        
+        self.start = time.perf_counter_ns()
+        self.marks: Dict[str, int] = {}
+
+    async def trace(self, event_name: str, info: Dict[str, Any]):
+        # "http11.send_request_headers.started" -> "send_request_headers.started"
+        _, _, event = event_name.partition(".")
+        self.marks.setdefault(event, time.perf_counter_ns())
+
+    @property
+    def new_connection(self) -> bool:
+        return "connect_tcp.complete" in self.marks
+
+    def _span(self, start_event: str, end_event: str) -> Optional[float]:
+        start = self.marks.get(start_event)
+        end = self.marks.get(end_event)
+        if start is None or end is None:
+            return None
+        return (end - start) / 1e6
+
+    def phases(self, end: int) -> Dict[str, Optional[float]]:
+        """Phase durations in milliseconds; None for phases that didn't happen"""
+        first_io = min(
+            (self.marks[e] for e in ("connect_tcp.started", "send_request_headers.started") if e in self.marks),
+            default=None,
+        )
+        headers_done = self.marks.get("receive_response_headers.complete")
+        return {
+            "queue": (first_io - self.start) / 1e6 if first_io is not None else None,
+            "connect": self._span("connect_tcp.started", "connect_tcp.complete"),
+            "tls": self._span("start_tls.started", "start_tls.complete"),
+            "send": self._span("send_request_headers.started", "send_request_body.complete"),
+            "server_wait": self._span("receive_response_headers.started", "receive_response_headers.complete"),
+            "ttfb": (headers_done - self.start) / 1e6 if headers_done is not None else None,
+            "download": self._span("receive_response_body.started", "receive_response_body.complete"),
+            "total": (end - self.start) / 1e6,
+        }
+
+
+@dataclass(frozen=True)
+class PreparedRequest:
+    """An API compiled once for repeated sending (see ApiTester.prepare).
+
+    Holds everything httpx would otherwise recompute per request: the
+    upper-cased method, the URL with query parameters merged, the final
+    header list (client defaults included) and the encoded body.
+    """
+
+    method: str
+    url: httpx.URL
+    headers: Tuple[Tuple[bytes, bytes], ...]
+    content: Optional[bytes]
+    host: str
+
+
+def pool_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Pool metrics for the span between two ApiTester.pool_stats() calls"""
+    delta = {
+        key: after[key] - before[key]
+        for key in ("requests", "new_connections", "reused_connections", "pool_waits", "pool_timeouts")
+    }
+    connected = delta["new_connections"] + delta["reused_connections"]
+    delta["reuse_rate"] = delta["reused_connections"] / connected if connected else 0.0
+    delta["connections_open"] = after["connections_open"]
+    delta["connections_idle"] = after["connections_idle"]
+    delta["peak_in_flight"] = after["peak_in_flight"]
+    return delta
+
+
+class ApiTester:
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        max_connections_per_host: Optional[int] = None,
+        http2: bool = False,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 30.0,
+        write_timeout: float = 30.0,
+        pool_timeout: float = 10.0,
+        capture_limit: int = 1024 * 1024,
+        cache: Optional[ResponseCache] = None,
+    ):
+        if http2 and not HTTP2_AVAILABLE:
+            print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+        # Constructor arguments, so load workers can build an identical tester
+        self.options = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "max_connections_per_host": max_connections_per_host,
+            "http2": http2,
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+            "write_timeout": write_timeout,
+            "pool_timeout": pool_timeout,
+            "capture_limit": capture_limit,
+        }
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2
+        self.capture_limit = capture_limit
+        # Conditional-request cache, consulted only by calls with use_cache=True
+        self.cache = cache
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=connect_timeout,
+                read=read_timeout,
+                write=write_timeout,
+                pool=pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+        )
+        self.metrics = PoolMetrics()
+        self._in_flight = 0
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._timeout = self.client.timeout.as_dict()
+
+    def _host_semaphore(self, host: str) -> Optional[asyncio.Semaphore]:
+        if not self.max_connections_per_host:
+            return None
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return semaphore
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Cumulative pool counters plus the connections currently held"""
+        stats = self.metrics.snapshot()
+        # httpx doesn't expose its pool publicly; fall back to zeros if that changes
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        stats["connections_open"] = len(connections)
+        stats["connections_idle"] = sum(1 for c in connections if c.is_idle())
+        return stats
+
+    def _build_request(self, api: Dict[str, Any], extensions: Optional[Dict[str, Any]] = None) -> httpx.Request:
+        method = api.get("method", "GET").upper()
+        url = api.get("url", "")
+        headers = api.get("headers", {})
+        body = api.get("body")
+        query_params = api.get("query_params", {})
+
+        # Convert body to JSON if it's a string
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except json.JSONDecodeError:
+                pass  # Keep as string if not valid JSON
+
+        return self.client.build_request(
+            method=method,
+            url=url,
+            headers=headers,
+            json=body if isinstance(body, (dict, list)) else None,
+            data=body if isinstance(body, str) else None,
+            params=query_params,
+            extensions=extensions,
+        )
+
+    def prepare(self, api: Dict[str, Any]) -> PreparedRequest:
+        """Compile an API once for loops that send it many times"""
+        request = self._build_request(api)
+        return PreparedRequest(
+            method=request.method,
+            url=request.url,
+            headers=tuple(request.headers.raw),
+            content=request.read() or None,
+            host=request.url.netloc.decode("ascii").lower(),
+        )
+
+    def _request_from(self, prepared: PreparedRequest, timer: "PhaseTimer") -> httpx.Request:
+        request = httpx.Request(
+            prepared.method,
+            prepared.url,
+            headers=prepared.headers,
+            content=prepared.content,
+            extensions={"timeout": self._timeout, "trace": timer.trace},
+        )
+        # Cookies the target set since prepare() still go out, as with build_request
+        if self.client.cookies:
+            self.client.cookies.set_cookie_header(request)
+        return request
+
+    async def test_api(
+        self,
+        api: Union[Dict[str, Any], PreparedRequest],
+        decode_body: bool = True,
+        capture_limit: Optional[int] = None,
+        use_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Test an API endpoint.
+
+        The response is streamed: at most `capture_limit` bytes are kept and
+        decoded, the rest is only counted and hashed. With decode_body=False
+        (performance and load runs) the body is drained without being kept.
+        use_cache revalidates against the response cache, if one is
+        configured; functional runs opt in, performance runs never should.
+        `api` may be a PreparedRequest from prepare(), which skips per-call
+        request construction (it is never cached).
+        """
+        prepared = isinstance(api, PreparedRequest)
+        cache_key = ResponseCache.key(api) if use_cache and self.cache is not None and not prepared else None
+        if cache_key is not None:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                api = {**api, "headers": {**(api.get("headers") or {}), **entry.validators()}}
+            result = await self._test(api, decode_body, capture_limit)
+            return self.cache.apply(cache_key, entry, result)
+        return await self._test(api, decode_body, capture_limit)
+
+    async def _test(self, api: Union[Dict[str, Any], PreparedRequest], decode_body: bool, capture_limit: Optional[int]) -> Dict[str, Any]:
+        timer = PhaseTimer()
+        limit = self.capture_limit if capture_limit is None else capture_limit
+        if isinstance(api, PreparedRequest):
+            host = api.host
+        else:
+            host = urlparse(api.get("url", "")).netloc.lower() if self.max_connections_per_host else ""
+        semaphore = self._host_semaphore(host)
+        if semaphore is not None and semaphore.locked():
+            self.metrics.pool_waits += 1
+
+        if semaphore is None:
+            return await self._send(api, timer, decode_body, limit)
+        async with semaphore:
+            return await self._send(api, timer, decode_body, limit)
+
+    @staticmethod
+    async def _read_body(response: httpx.Response, decode_body: bool, limit: int):
+        """Drain a streamed response, keeping at most `limit` bytes"""
+        captured = bytearray()
+        size = 0
+        digest = hashlib.sha256() if decode_body else None
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if digest is None:
+                continue
+            digest.update(chunk)
+            if len(captured) < limit:
+                captured += chunk[:limit - len(captured)]
+        return bytes(captured), size, digest.hexdigest() if digest else None
+
+    @staticmethod
+    def _decode_body(response: httpx.Response, captured: bytes, truncated: bool) -> Any:
+        if not truncated:
+            try:
+                return json.loads(captured)
+            except ValueError:
+                pass
+        return captured.decode(response.encoding or "utf-8", errors="replace")
+
+    async def _send(self, api: Union[Dict[str, Any], PreparedRequest], timer: PhaseTimer, decode_body: bool, limit: int) -> Dict[str, Any]:
+        if self._in_flight >= self.max_connections:
+            self.metrics.pool_waits += 1
+        self._in_flight += 1
+        self.metrics.peak_in_flight = max(self.metrics.peak_in_flight, self._in_flight)
+
         try:
-            # Prepare request
-            method = api.get("method", "GET").upper()
-            url = api.get("url", "")
-            headers = api.get("headers", {})
-            body = api.get("body")
-            query_params = api.get("query_params", {})
-            
-            # Convert body to JSON if it's a string
-            if isinstance(body, str):
-                try:
-                    body = json.loads(body)
-                except json.JSONDecodeError:
-                    pass  # Keep as string if not valid JSON
-            
             # Make request
-            response = await self.client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=body if isinstance(body, (dict, list)) else None,
-                data=body if isinstance(body, str) else None,
-                params=query_params
-            )
-            
-            # Calculate response time
-            end_time = datetime.now()
-            response_time = (end_time - start_time).total_seconds()
-            
-            # Get response body
+            if isinstance(api, PreparedRequest):
+                request = self._request_from(api, timer)
+            else:
+                request = self._build_request(api, extensions={"trace": timer.trace})
+            response = await self.client.send(request, stream=True)
             try:
-                response_body = response.json()
-            except json.JSONDecodeError:
-                response_body = response.text
-            
+                captured, body_size, body_sha256 = await self._read_body(response, decode_body, limit)
+            finally:
+                await response.aclose()
+
+            # Calculate response time before any decoding work of our own
+            end = time.perf_counter_ns()
+            response_time = (end - timer.start) / 1e9
+
+            self.metrics.requests += 1
+            if timer.new_connection:
+                self.metrics.new_connections += 1
+            else:
+                self.metrics.reused_connections += 1
+
+            # Get response body
+            truncated = body_size > len(captured)
+            response_body = self._decode_body(response, captured, truncated) if decode_body else None
+
             return {
                 "success": 200 <= response.status_code < 300,
                 "status_code": response.status_code,
                 "response_time": response_time,
+                "timings": timer.phases(end),
                 "response_body": response_body,
+                "body_size": body_size,
+                "body_truncated": decode_body and truncated,
+                "body_sha256": body_sha256,
                 "headers": dict(response.headers)
             }
-            
+
+        except httpx.PoolTimeout:
+            self.metrics.pool_timeouts += 1
+            return {
+                "success": False,
+                "error": f"Timed out waiting for a pooled connection after {self.client.timeout.pool} seconds",
+                "response_time": (time.perf_counter_ns() - timer.start) / 1e9,
+                "timings": timer.phases(time.perf_counter_ns()),
+                "status_code": None,
+                "response_body": None
+            }
+
         except httpx.TimeoutException as e:
             return {
                 "success": False,
-                "error": f"Request timed out after {self.client.timeout} seconds",
-                "response_time": (datetime.now() - start_time).total_seconds(),
+                "error": f"Request timed out: {type(e).__name__}",
+                "response_time": (time.perf_counter_ns() - timer.start) / 1e9,
+                "timings": timer.phases(time.perf_counter_ns()),
                 "status_code": None,
                 "response_body": None
             }
-            
+
         except httpx.RequestError as e:
             return {
                 "success": False,
                 "error": f"Request failed: {str(e)}",
-                "response_time": (datetime.now() - start_time).total_seconds(),
+                "response_time": (time.perf_counter_ns() - timer.start) / 1e9,
+                "timings": timer.phases(time.perf_counter_ns()),
                 "status_code": None,
                 "response_body": None
             }
-            
+
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Unexpected error: {str(e)}",
-                "response_time": (datetime.now() - start_time).total_seconds(),
+                "response_time": (time.perf_counter_ns() - timer.start) / 1e9,
+                "timings": timer.phases(time.perf_counter_ns()),
                 "status_code": None,
                 "response_body": None
             }
-    
+
+        finally:
+            self._in_flight -= 1
+
     async def close(self):
         """Close the HTTP client"""
-        await self.client.aclose() 
\ No newline at end of file
+        await self.client.aclose()
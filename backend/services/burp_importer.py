@@ -0,0 +1,125 @@
+import base64
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Iterator, Optional
+
+# Bytes read from an upload per parser feed
+CHUNK_SIZE = 256 * 1024
+
+
+def _element_text(element: Optional[ET.Element]) -> str:
+    if element is None or element.text is None:
+        return ""
+    if element.get("base64") == "true":
+        return base64.b64decode(element.text).decode("utf-8", errors="replace")
+    return element.text
+
+
+def _parse_request(request_text: str) -> Optional[Dict[str, Any]]:
+    """Split a raw HTTP request into method, headers and body"""
+    request_lines = request_text.split("\n")
+    first_line = request_lines[0]
+    if not first_line:
+        print("Empty first line")
+        return None
+
+    parts = first_line.split(" ")
+    if len(parts) < 3:
+        print(f"Invalid first line format: {first_line}")
+        return None
+
+    method = parts[0]
+    headers = {}
+    body = None
+    body_started = False
+
+    for line in request_lines[1:]:
+        if not body_started:
+            if not line.strip():
+                body_started = True
+            elif ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip()] = value.strip()
+        elif body is None:
+            body = line
+        else:
+            body += "\n" + line
+
+    return {"method": method, "headers": headers, "body": body}
+
+
+def parse_item(item: ET.Element, decode_responses: bool = False) -> Optional[Dict[str, Any]]:
+    """Convert one Burp <item> element; the response body is only decoded on request"""
+    request = item.find("request")
+    response = item.find("response")
+    if request is None or response is None:
+        return None
+
+    parsed = _parse_request(_element_text(request))
+    if parsed is None:
+        return None
+
+    status = item.findtext("status") or "0"
+    response_data: Dict[str, Any] = {
+        "status_code": int(status) if status.isdigit() else 0,
+        "headers": {},  # You can parse response headers if needed
+        "body": _element_text(response) if decode_responses else None,
+    }
+    length = item.findtext("responselength")
+    if length and length.isdigit():
+        response_data["length"] = int(length)
+
+    return {
+        "request": {
+            "method": parsed["method"],
+            "url": item.findtext("url") or "",
+            "headers": parsed["headers"],
+            "body": parsed["body"],
+        },
+        "response": response_data,
+    }
+
+
+class BurpStreamParser:
+    """Incremental Burp Suite XML parser.
+
+    Feed it raw chunks of the export; each completed <item> is converted and
+    then cleared, so memory stays at roughly one item regardless of file size.
+    """
+
+    def __init__(self, decode_responses: bool = False):
+        self.decode_responses = decode_responses
+        self.parsed = 0
+        self.skipped = 0
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: Optional[ET.Element] = None
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            if element.tag != "item":
+                continue
+            try:
+                item = parse_item(element, self.decode_responses)
+            except Exception as e:
+                print(f"Error processing request/response: {e}")
+                item = None
+            # Drop the processed subtree so the tree never grows
+            element.clear()
+            if self._root is not None:
+                self._root.clear()
+            if item is None:
+                self.skipped += 1
+                continue
+            self.parsed += 1
+            yield item
@@ -0,0 +1,252 @@
+import asyncio
+import base64
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, Any, List, Optional, Iterator, Iterable
+from urllib.parse import urlparse
+
+from app.database import Base, SessionLocal, engine
+from app.models import APIRequest
+from services.result_writer import ResultWriter
+from services.events import EventBroker
+
+STATUSES = ("pending", "running", "completed", "failed")
+
+# Columns copied between API dicts and APIRequest rows
+API_FIELDS = ("name", "url", "method", "headers", "body", "query_params", "original_request", "original_response")
+
+
+def encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Raises ValueError for cursors we didn't issue"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    position = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    if position < 0:
+        raise ValueError("negative cursor")
+    return position
+
+
+def content_hash(api: Dict[str, Any]) -> str:
+    """Identity of the request an API sends: method, URL, query, headers and body"""
+    headers = {name.lower(): value for name, value in (api.get("headers") or {}).items()}
+    material = json.dumps(
+        [(api.get("method") or "GET").upper(), api.get("url") or "", api.get("query_params") or {}, headers, api.get("body")],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _row_to_api(row: APIRequest) -> Dict[str, Any]:
+    api = {"id": row.api_id, **{field: getattr(row, field) for field in API_FIELDS}}
+    # Only Burp imports carry the original request/response
+    if api["original_request"] is None:
+        del api["original_request"], api["original_response"]
+    api["headers"] = api["headers"] or {}
+    api["query_params"] = api["query_params"] or {}
+    # A test still running when the server stopped never finished
+    api["status"] = "pending" if row.status == "running" else row.status
+    api["test_results"] = row.last_result
+    return api
+
+
+def _api_to_row(api: Dict[str, Any]) -> APIRequest:
+    return APIRequest(
+        api_id=api["id"],
+        status=api["status"],
+        last_result=api.get("test_results"),
+        **{field: api.get(field) for field in API_FIELDS},
+    )
+
+
+class ApiCatalog:
+    """API catalog persisted through the SQLAlchemy models.
+
+    Every API is also held in an in-memory id -> dict map (in insertion
+    order), so lookups and iteration never touch the database. Status
+    changes go through set_status(), which keeps the per-status, per-host
+    and per-method counters current so summaries are O(1). A content-hash
+    index marks each API that repeats an earlier one with `duplicate_of`.
+    """
+
+    def __init__(self, session_factory=SessionLocal, writer: Optional[ResultWriter] = None, events: Optional[EventBroker] = None):
+        self.session_factory = session_factory
+        self.writer = writer or ResultWriter()
+        self.events = events
+        self._apis: Dict[str, Dict[str, Any]] = {}
+        # Insertion order as a list, so pagination can resume by position
+        self._order: List[str] = []
+        # Bumped on every change; used for ETags and cache keys
+        self.version = 0
+        self._status_counts: Counter = Counter()
+        self._host_counts: Dict[str, Counter] = {}
+        self._method_counts: Dict[str, Counter] = {}
+        # content hash -> id of the first API with that request
+        self._by_hash: Dict[str, str] = {}
+        self.duplicate_count = 0
+
+    def load(self):
+        """Create tables if needed, read the stored catalog and start the result writer"""
+        Base.metadata.create_all(bind=engine)
+        with self.session_factory() as db:
+            rows = db.query(APIRequest).order_by(APIRequest.id).yield_per(1000)
+            self._apis = {}
+            self._order = []
+            self._status_counts.clear()
+            self._host_counts.clear()
+            self._method_counts.clear()
+            self._by_hash.clear()
+            self.duplicate_count = 0
+            for row in rows:
+                api = _row_to_api(row)
+                self._index(api)
+                self._apis[api["id"]] = api
+                self._order.append(api["id"])
+                self._count(api, 1)
+        self.version += 1
+        print(f"Loaded {len(self._apis)} APIs from the catalog")
+        self.writer.start()
+
+    async def close(self):
+        await self.writer.close()
+
+    def __len__(self) -> int:
+        return len(self._apis)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._apis.values())
+
+    def __contains__(self, api_id: str) -> bool:
+        return api_id in self._apis
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._apis.values())
+
+    def get(self, api_id: str) -> Optional[Dict[str, Any]]:
+        return self._apis.get(api_id)
+
+    def page(
+        self,
+        start: int = 0,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        method: Optional[str] = None,
+        host: Optional[str] = None,
+        name: Optional[str] = None,
+        unique: bool = False,
+    ):
+        """Filtered run of APIs in insertion order starting at position `start`.
+
+        Returns (apis, next_position); next_position is None once the end
+        of the catalog is reached.
+        """
+        method = method.upper() if method else None
+        host = host.lower() if host else None
+        name = name.lower() if name else None
+        matches = []
+        position = start
+        order = self._order
+        while position < len(order):
+            api = self._apis[order[position]]
+            position += 1
+            if status and api["status"] != status:
+                continue
+            if method and (api.get("method") or "GET").upper() != method:
+                continue
+            if host and urlparse(api.get("url") or "").netloc.lower() != host:
+                continue
+            if name and name not in (api.get("name") or "").lower():
+                continue
+            if unique and api.get("duplicate_of"):
+                continue
+            matches.append(api)
+            if limit and len(matches) >= limit:
+                break
+        return matches, position if position < len(order) else None
+
+    async def add_many(self, apis: Iterable[Dict[str, Any]]):
+        """Store new APIs in a single transaction"""
+        apis = list(apis)
+        if not apis:
+            return
+        # Off the event loop: a large import would otherwise stall every request
+        await asyncio.to_thread(self._insert, apis)
+        for api in apis:
+            self._index(api)
+            self._apis[api["id"]] = api
+            self._order.append(api["id"])
+            self._count(api, 1)
+        self.version += 1
+
+    def _index(self, api: Dict[str, Any]):
+        """Set content_hash and duplicate_of (None for the first of its kind)"""
+        api["content_hash"] = content_hash(api)
+        first = self._by_hash.setdefault(api["content_hash"], api["id"])
+        api["duplicate_of"] = first if first != api["id"] else None
+        if api["duplicate_of"]:
+            self.duplicate_count += 1
+
+    def _insert(self, apis: List[Dict[str, Any]]):
+        with self.session_factory() as db:
+            db.add_all(_api_to_row(api) for api in apis)
+            db.commit()
+
+    async def add(self, api: Dict[str, Any]):
+        await self.add_many([api])
+
+    def _count(self, api: Dict[str, Any], delta: int):
+        status = api["status"]
+        self._status_counts[status] += delta
+        host = urlparse(api.get("url") or "").netloc.lower()
+        self._host_counts.setdefault(host, Counter())[status] += delta
+        method = (api.get("method") or "GET").upper()
+        self._method_counts.setdefault(method, Counter())[status] += delta
+
+    def set_status(self, api: Dict[str, Any], status: str):
+        """Change an API's status, keeping the summary counters in step"""
+        if api["status"] == status:
+            return
+        if api["id"] in self._apis:
+            self._count(api, -1)
+            api["status"] = status
+            self._count(api, 1)
+            self.version += 1
+            self._publish(api)
+        else:
+            api["status"] = status
+
+    def _publish(self, api: Dict[str, Any], result: Optional[Dict[str, Any]] = None):
+        if self.events is None:
+            return
+        event = {"api_id": api["id"], "name": api.get("name"), "status": api["status"]}
+        if result is not None:
+            event["status_code"] = result.get("status_code")
+            event["response_time"] = result.get("response_time")
+            event["error"] = result.get("error")
+        self.events.publish("api", api["id"], event)
+        self.events.publish("summary", "catalog", {"total": len(self._apis), "status_summary": self.status_summary()})
+
+    def status_summary(self) -> Dict[str, int]:
+        return {status: self._status_counts[status] for status in STATUSES}
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Status counts overall, per target host and per HTTP method"""
+        def summarize(counts: Counter) -> Dict[str, int]:
+            return {status: counts[status] for status in STATUSES}
+        return {
+            "total": len(self._apis),
+            "duplicates": self.duplicate_count,
+            "status_summary": self.status_summary(),
+            "by_host": {host: summarize(c) for host, c in self._host_counts.items() if sum(c.values())},
+            "by_method": {method: summarize(c) for method, c in self._method_counts.items() if sum(c.values())},
+        }
+
+    async def save_result(self, api: Dict[str, Any], result: Dict[str, Any]):
+        """Queue the API's latest status and a TestResult row for the batched writer"""
+        self.version += 1
+        self._publish(api, result)
+        await self.writer.put(api["id"], result, status=api["status"])
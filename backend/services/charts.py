@@ -0,0 +1,79 @@
+import asyncio
+import io
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Hashable
+
+
+def render_png(spec: Dict[str, Any]) -> bytes:
+    """Draw a chart spec to PNG; runs in a chart worker process.
+
+    spec: {"kind": "line" | "bar", "title", "xlabel", "ylabel",
+           "x": [...], "series": {label: [values...]}}
+    """
+    # Imported here so matplotlib only ever loads inside chart workers
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(9, 4), dpi=100)
+    try:
+        if spec["kind"] == "bar":
+            labels = list(spec["series"].keys())
+            ax.bar(labels, [spec["series"][label] for label in labels], color="#6366f1")
+        else:
+            for label, values in spec["series"].items():
+                ax.plot(spec["x"], values, label=label, linewidth=1.2)
+            if len(spec["series"]) > 1:
+                ax.legend(loc="upper left")
+        ax.set_title(spec.get("title", ""))
+        ax.set_xlabel(spec.get("xlabel", ""))
+        ax.set_ylabel(spec.get("ylabel", ""))
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class ChartRenderer:
+    """Renders charts in a small process pool and caches the PNGs.
+
+    The pool is created on first use, so neither matplotlib nor the worker
+    processes cost anything until a chart is actually requested.
+    """
+
+    def __init__(self, workers: int = 1, max_cached: int = 64):
+        self.workers = workers
+        self.max_cached = max_cached
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def render(self, key: Hashable, spec: Dict[str, Any]) -> bytes:
+        """PNG for spec, reused for as long as `key` stays the same"""
+        png = self._cache.get(key)
+        if png is not None:
+            self._cache.move_to_end(key)
+            return png
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(self._pool(), render_png, spec)
+        self._cache[key] = png
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return png
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Set, Iterable
+
+
+class Subscription:
+    """One client's pending events, coalesced by key.
+
+    A newer event for the same key (e.g. the same API or load test) replaces
+    the undelivered one, so a slow client only ever sees the latest state.
+    If too many distinct keys pile up the backlog collapses into a single
+    'resync' event telling the client to refetch.
+    """
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, max_pending: int = 1000):
+        self.topics: Optional[Set[str]] = set(topics) if topics else None
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    def offer(self, key: str, event: Dict[str, Any]):
+        if "resync" in self._pending:
+            return
+        self._pending.pop(key, None)
+        self._pending[key] = event
+        if len(self._pending) > self.max_pending:
+            self._pending = {"resync": {"type": "resync"}}
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait for events and take everything pending; [] on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = list(self._pending.values())
+        self._pending = {}
+        self._ready.clear()
+        return batch
+
+
+class EventBroker:
+    """Fan-out of progress events to WebSocket and SSE subscribers"""
+
+    def __init__(self):
+        self._subscribers: Set[Subscription] = set()
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(topics)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, topic: str, key: str, data: Dict[str, Any]):
+        if not self._subscribers:
+            return
+        event = {"type": topic, **data}
+        coalesce_key = f"{topic}:{key}"
+        for subscription in self._subscribers:
+            if subscription.wants(topic):
+                subscription.offer(coalesce_key, event)
@@ -0,0 +1,241 @@
+import time
+from array import array
+from typing import Dict, Any, Optional
+
+# Log-linear bucketing in the style of HdrHistogram: values below
+# SUB_BUCKET_COUNT are exact, above that each power of two is split into
+# SUB_BUCKET_HALF linear sub-buckets, bounding relative error to < 1%.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+MAX_EXPONENT = 34  # ~2^41 microseconds, about 25 days
+BUCKET_COUNT = SUB_BUCKET_COUNT + MAX_EXPONENT * SUB_BUCKET_HALF
+MAX_VALUE = (1 << (SUB_BUCKET_BITS + MAX_EXPONENT)) - 1
+
+REPORTED_PERCENTILES = {
+    "p50": 50.0,
+    "p90": 90.0,
+    "p95": 95.0,
+    "p99": 99.0,
+    "p999": 99.9,
+}
+
+
+def _bucket_index(value: int) -> int:
+    if value < SUB_BUCKET_COUNT:
+        return value
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (exponent - 1) * SUB_BUCKET_HALF + (value >> exponent) - SUB_BUCKET_HALF
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of the value range covered by a bucket"""
+    if index < SUB_BUCKET_COUNT:
+        return float(index)
+    exponent = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    sub_bucket = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return (sub_bucket << exponent) + ((1 << exponent) - 1) / 2
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram; values are recorded in milliseconds
+    and stored internally at microsecond resolution"""
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value_ms: float):
+        micros = min(max(int(value_ms * 1000), 0), MAX_VALUE)
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples into this one"""
+        if not other.count:
+            return
+        counts = self.counts
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form for shipping between processes: only non-empty buckets"""
+        return {
+            "buckets": [[index, count] for index, count in enumerate(self.counts) if count],
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        for index, count in data["buckets"]:
+            histogram.counts[index] = count
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def reset(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Value in milliseconds at or below which `percentile` % of samples fall"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * percentile / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count:
+                seen += bucket_count
+                if seen >= target:
+                    value = _bucket_value(index) / 1000
+                    # Bucket midpoints can stray outside the observed range
+                    return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self) -> Dict[str, float]:
+        """All reported percentiles in a single pass over the buckets"""
+        result = {name: 0.0 for name in REPORTED_PERCENTILES}
+        if not self.count:
+            return result
+        targets = sorted(
+            (max(1, int(round(self.count * p / 100.0))), name)
+            for name, p in REPORTED_PERCENTILES.items()
+        )
+        position = 0
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while position < len(targets) and seen >= targets[position][0]:
+                value = _bucket_value(index) / 1000
+                result[targets[position][1]] = min(max(value, self.min), self.max)
+                position += 1
+            if position == len(targets):
+                break
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": self.mean,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            **self.percentiles(),
+        }
+
+
+class RunStats:
+    """Streaming aggregate for a test run: latency histogram plus counters"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+        self.errors = 0  # requests that produced no HTTP response at all
+        self.status_codes: Dict[int, int] = {}
+        self.started_at = time.monotonic()
+        self.last_recorded_at: Optional[float] = None
+
+    def record(self, result: Dict[str, Any]):
+        """Feed one ApiTester result; only the small fields are kept"""
+        self.histogram.record(result.get("response_time", 0) * 1000)
+        if result.get("success"):
+            self.successes += 1
+        else:
+            self.failures += 1
+        status_code = result.get("status_code")
+        if status_code is None:
+            self.errors += 1
+        else:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.last_recorded_at = time.monotonic()
+
+    def merge(self, other: "RunStats"):
+        self.histogram.merge(other.histogram)
+        self.successes += other.successes
+        self.failures += other.failures
+        self.errors += other.errors
+        for status_code, count in other.status_codes.items():
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + count
+        self.started_at = min(self.started_at, other.started_at)
+        if other.last_recorded_at is not None:
+            self.last_recorded_at = max(self.last_recorded_at or 0.0, other.last_recorded_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counters and histogram without timestamps, which are per-process"""
+        return {
+            "histogram": self.histogram.to_dict(),
+            "successes": self.successes,
+            "failures": self.failures,
+            "errors": self.errors,
+            "status_codes": self.status_codes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunStats":
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.successes = data["successes"]
+        stats.failures = data["failures"]
+        stats.errors = data["errors"]
+        stats.status_codes = {int(code): count for code, count in data["status_codes"].items()}
+        if stats.total:
+            # Treat arrival as the time of the latest sample
+            stats.last_recorded_at = time.monotonic()
+        return stats
+
+    @property
+    def total(self) -> int:
+        return self.histogram.count
+
+    @property
+    def elapsed(self) -> float:
+        end = self.last_recorded_at if self.last_recorded_at is not None else time.monotonic()
+        return max(end - self.started_at, 0.0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency figures are in milliseconds"""
+        latency = self.histogram.summary()
+        elapsed = self.elapsed
+        return {
+            "total_requests": self.total,
+            "successful_requests": self.successes,
+            "failed_requests": self.failures,
+            "errors": self.errors,
+            "success_rate": (self.successes / self.total) * 100 if self.total else 0.0,
+            "throughput": self.total / elapsed if elapsed else 0.0,
+            "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+            "avg_response_time": latency["avg"],
+            "min_response_time": latency["min"],
+            "max_response_time": latency["max"],
+            "percentiles": {name: latency[name] for name in REPORTED_PERCENTILES},
+        }
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Methods whose responses may be replayed from the cache
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+# Request headers that must not become part of the cache key
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+class CacheEntry:
+    """Validators and captured response of one cacheable request"""
+
+    def __init__(self, result: Dict[str, Any], etag: Optional[str], last_modified: Optional[str]):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.status_code = result["status_code"]
+        self.response_body = result.get("response_body")
+        self.body_size = result.get("body_size")
+        self.body_truncated = result.get("body_truncated")
+        self.body_sha256 = result.get("body_sha256")
+        self.headers = result.get("headers")
+        self.stored_at = time.monotonic()
+        self.size = self._size()
+
+    def _size(self) -> int:
+        """Approximate bytes held: the captured body plus headers"""
+        body = self.response_body
+        if isinstance(body, str):
+            size = len(body.encode("utf-8", errors="replace"))
+        else:
+            # Decoded JSON is only kept for bodies captured in full
+            size = self.body_size or 0
+        return size + sum(len(k) + len(str(v)) for k, v in (self.headers or {}).items())
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Bounded LRU + TTL store for conditional replay of functional tests.
+
+    Every request still goes to the target: a stored entry only adds
+    If-None-Match / If-Modified-Since, and a 304 is answered with the
+    stored body, so re-running an unchanged catalog costs headers instead
+    of bodies. Entries expire after `ttl` seconds, and the least recently
+    used are evicted past `max_entries` or `max_bytes` of stored bodies.
+    Separately, the body
+    hash of each request's last response is remembered (LRU only) so
+    results can say whether the response changed since the previous run.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._fingerprints: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0  # 304s answered from the store
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def key(api: Dict[str, Any]) -> Optional[str]:
+        """Cache key for an API, or None if its method is not cacheable"""
+        method = api.get("method", "GET").upper()
+        if method not in CACHEABLE_METHODS:
+            return None
+        headers = {
+            name.lower(): value for name, value in (api.get("headers") or {}).items()
+            if name.lower() not in CONDITIONAL_HEADERS
+        }
+        material = json.dumps(
+            [method, api.get("url", ""), api.get("query_params") or {}, headers],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, entry: CacheEntry):
+        self._discard(key)
+        if entry.size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        self._entries[key] = entry
+        self.bytes += entry.size
+        self.stores += 1
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def _remember(self, key: str, body_sha256: Optional[str]) -> Optional[bool]:
+        """Record this run's body hash; True/False if it differs from the last run"""
+        if body_sha256 is None:
+            return None
+        previous = self._fingerprints.get(key)
+        self._fingerprints[key] = body_sha256
+        self._fingerprints.move_to_end(key)
+        while len(self._fingerprints) > self.max_entries:
+            self._fingerprints.popitem(last=False)
+        return None if previous is None else previous != body_sha256
+
+    def apply(self, key: str, entry: Optional[CacheEntry], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold a response into the cache and annotate the result.
+
+        Adds "cache" ("revalidated" when a 304 was answered from the store,
+        otherwise "miss") and "changed" (None on the first run).
+        """
+        if entry is not None and result.get("status_code") == 304:
+            self.hits += 1
+            entry.stored_at = time.monotonic()
+            result.update({
+                "success": 200 <= entry.status_code < 300,
+                "status_code": entry.status_code,
+                "response_body": entry.response_body,
+                "body_size": entry.body_size,
+                "body_truncated": entry.body_truncated,
+                "body_sha256": entry.body_sha256,
+                "headers": {**(entry.headers or {}), **(result.get("headers") or {})},
+                "cache": "revalidated",
+            })
+        else:
+            self.misses += 1
+            result["cache"] = "miss"
+            headers = {name.lower(): value for name, value in (result.get("headers") or {}).items()}
+            etag, last_modified = headers.get("etag"), headers.get("last-modified")
+            if result.get("status_code") == 200 and (etag or last_modified) and "no-store" not in headers.get("cache-control", ""):
+                self._store(key, CacheEntry(result, etag, last_modified))
+        result["changed"] = self._remember(key, result.get("body_sha256"))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "revalidated": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,139 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from services.events import EventBroker
+
+# advance() publishes progress at most this often (status changes always publish),
+# like load tests, which are sampled once per second
+PROGRESS_INTERVAL = 1.0
+
+
+class Job:
+    """A background test run with progress, cancellation and a result"""
+
+    def __init__(self, kind: str, total: Optional[int], params: Optional[Dict[str, Any]] = None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"
+        # None when the amount of work is not known up front (duration-bound runs)
+        self.total = total
+        self.done = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._on_progress: Optional[Callable[["Job"], None]] = None
+        self._published_at = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def advance(self, count: int = 1):
+        self.done += count
+        if self._on_progress is not None:
+            self._on_progress(self)
+
+    async def wait(self) -> Any:
+        """Wait for the job to finish and return its result"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.result
+
+    def _percent(self) -> Optional[float]:
+        if self.total is None:
+            # Unknown until the run ends
+            return 100.0 if self.finished else None
+        return (self.done / self.total) * 100 if self.total else 100.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "percent": self._percent(),
+            },
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs jobs as tasks on the event loop and keeps recent ones for lookup"""
+
+    def __init__(self, events: Optional[EventBroker] = None, max_finished: int = 200):
+        self.events = events
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+
+    def submit(self, job: Job, fn: Callable[[Job], Awaitable[Any]]) -> Job:
+        job._on_progress = self._progress
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job, fn))
+        self._evict()
+        return job
+
+    async def _run(self, job: Job, fn: Callable[[Job], Awaitable[Any]]):
+        job.status = "running"
+        job.started_at = time.time()
+        self._publish(job)
+        try:
+            job.result = await fn(job)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._publish(job)
+
+    def _progress(self, job: Job):
+        if job.done != job.total and time.monotonic() - job._published_at < PROGRESS_INTERVAL:
+            return
+        self._publish(job)
+
+    def _publish(self, job: Job):
+        # Nobody listening: don't build the event at all
+        if self.events is None or not self.events.subscriber_count:
+            return
+        job._published_at = time.monotonic()
+        self.events.publish("job", job.id, job.to_dict())
+
+    def _evict(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job._task is None:
+            return False
+        job._task.cancel()
+        return True
+
+    async def shutdown(self):
+        """Cancel everything still running"""
+        tasks = [job._task for job in self._jobs.values() if job._task and not job._task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
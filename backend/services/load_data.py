@@ -0,0 +1,351 @@
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+from typing import Dict, Any, Callable, Iterator, List, Optional, Set
+
+# {{name}} placeholders in URLs, headers, query parameters and bodies
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][\w.-]*)\s*\}\}")
+
+# Rows are read from data files in pieces of this size
+READ_SIZE = 64 * 1024
+
+DATA_FORMATS = (".csv", ".json", ".jsonl", ".ndjson")
+
+
+def _json_array_rows(f) -> Iterator[Dict[str, Any]]:
+    """Objects of a top-level JSON array, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    opened = False
+    eof = False
+    while True:
+        # Skip whitespace and separators up to the next value
+        while position < len(buffer) and (buffer[position].isspace() or (opened and buffer[position] == ",")):
+            position += 1
+        if position < len(buffer):
+            if not opened:
+                if buffer[position] != "[":
+                    raise ValueError("JSON data files must contain an array of objects")
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Truncated or invalid JSON data file")
+            else:
+                if not isinstance(row, dict):
+                    raise ValueError("JSON data files must contain an array of objects")
+                yield row
+                continue
+        elif eof:
+            if opened:
+                raise ValueError("Truncated JSON data file")
+            return
+        chunk = f.read(READ_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def _json_lines_rows(f) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        if line.strip():
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("JSON Lines data files must contain one object per line")
+            yield row
+
+
+class DataFeed:
+    """Rows of a CSV / JSON / JSON Lines file, streamed as they are needed.
+
+    order="sequential" hands rows out in file order, so concurrent virtual
+    users round-robin through the file; order="random" draws from a
+    shuffle buffer of `buffer_size` rows, so memory stays bounded however
+    large the file is. With loop=True the file is reopened at the end,
+    otherwise next() returns None once every row has been used. A feed
+    for shard `shard` of `shards` only sees every shards-th row, so
+    worker processes never send the same row twice.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        order: str = "sequential",
+        loop: bool = True,
+        buffer_size: int = 1000,
+        shard: int = 0,
+        shards: int = 1,
+        seed: Optional[int] = None,
+    ):
+        if not path.endswith(DATA_FORMATS):
+            raise ValueError(f"Unsupported data file {os.path.basename(path)}; use one of {', '.join(DATA_FORMATS)}")
+        if order not in ("sequential", "random"):
+            raise ValueError("order must be 'sequential' or 'random'")
+        if not os.path.isfile(path):
+            raise ValueError(f"Data file not found: {os.path.basename(path)}")
+        self.path = path
+        self.order = order
+        self.loop = loop
+        self.buffer_size = max(1, buffer_size)
+        self.shard = shard
+        self.shards = max(1, shards)
+        self.passes = 0
+        self._random = random.Random(seed)
+        self._rows: Optional[Iterator[Dict[str, Any]]] = None
+        self._buffer: List[Dict[str, Any]] = []
+
+    def _open(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.path.endswith(".csv"):
+                rows = csv.DictReader(f)
+            elif self.path.endswith(".json"):
+                rows = _json_array_rows(f)
+            else:
+                rows = _json_lines_rows(f)
+            for index, row in enumerate(rows):
+                if index % self.shards == self.shard:
+                    yield row
+
+    def columns(self) -> Set[str]:
+        """Field names of the first row, for checking placeholders up front"""
+        rows = self._open()
+        try:
+            return set(next(rows, {}))
+        finally:
+            rows.close()
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """Next row from the file, reopening it at the end when looping"""
+        for _ in range(2):
+            if self._rows is None:
+                if self.passes and not self.loop:
+                    return None
+                self._rows = self._open()
+                self.passes += 1
+            row = next(self._rows, None)
+            if row is not None:
+                return row
+            self._rows = None
+        return None  # the file (or this shard of it) has no rows
+
+    def next(self) -> Optional[Dict[str, Any]]:
+        if self.order == "sequential":
+            return self._read()
+        while len(self._buffer) < self.buffer_size:
+            row = self._read()
+            if row is None:
+                break
+            self._buffer.append(row)
+        if not self._buffer:
+            return None
+        index = self._random.randrange(len(self._buffer))
+        self._buffer[index], self._buffer[-1] = self._buffer[-1], self._buffer[index]
+        return self._buffer.pop()
+
+    def close(self):
+        if self._rows is not None:
+            self._rows.close()
+            self._rows = None
+        self._buffer = []
+
+
+def _compile(value: Any, names: Set[str]) -> Callable[[Dict[str, Any]], Any]:
+    """A function rendering `value` with variables; constants cost nothing"""
+    if isinstance(value, str):
+        parts = PLACEHOLDER.split(value)
+        if len(parts) == 1:
+            return lambda variables: value
+        names.update(parts[1::2])
+
+        def render(variables: Dict[str, Any]) -> str:
+            # parts alternate literal text and placeholder names
+            return "".join(
+                part if i % 2 == 0 else str(variables.get(part, ""))
+                for i, part in enumerate(parts)
+            )
+        return render
+    if isinstance(value, dict):
+        items = [(key, _compile(item, names)) for key, item in value.items()]
+        return lambda variables: {key: render(variables) for key, render in items}
+    if isinstance(value, list):
+        items = [_compile(item, names) for item in value]
+        return lambda variables: [render(variables) for render in items]
+    return lambda variables: value
+
+
+class RequestTemplate:
+    """An API dict with {{name}} placeholders, compiled once.
+
+    render() substitutes variables into the URL, header and query
+    parameter values and the body; unknown names render as "".
+    """
+
+    TEMPLATED_FIELDS = ("url", "headers", "query_params", "body")
+
+    def __init__(self, api: Dict[str, Any]):
+        self.api = api
+        self.placeholders: Set[str] = set()
+        self._fields = {
+            field: _compile(api[field], self.placeholders)
+            for field in self.TEMPLATED_FIELDS if field in api
+        }
+
+    @property
+    def static(self) -> bool:
+        return not self.placeholders
+
+    def render(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        return {**self.api, **{field: render(variables) for field, render in self._fields.items()}}
+
+
+def extract(result: Dict[str, Any], rule: str) -> Optional[Any]:
+    """Pull a value out of a test result.
+
+    "header:Name" reads a response header; anything else is a dotted path
+    into the JSON body ("data.items.0.id"), optionally prefixed "body:".
+    """
+    if rule.startswith("header:"):
+        name = rule[len("header:"):].strip().lower()
+        headers = result.get("headers") or {}
+        return next((value for key, value in headers.items() if key.lower() == name), None)
+    if rule.startswith("body:"):
+        rule = rule[len("body:"):]
+    value = result.get("response_body")
+    for step in (s for s in rule.split(".") if s):
+        if isinstance(value, dict):
+            value = value.get(step)
+        elif isinstance(value, list) and step.lstrip("-").isdigit() and -len(value) <= int(step) < len(value):
+            value = value[int(step)]
+        else:
+            return None
+    return value
+
+
+class Session:
+    """Variables of one virtual user, kept across its requests"""
+
+    def __init__(self):
+        self.variables: Dict[str, Any] = {}
+        self.lock = asyncio.Lock()
+        self.ready = False
+
+
+class Scenario:
+    """How a parameterized load test builds each request.
+
+    Built from the start request's options:
+      data     {"file", "order", "loop", "buffer_size", "seed"}; each
+               request takes the next row, whose fields become variables
+      extract  {variable: rule} applied to every response (see extract())
+      setup    an API (with its own optional data / extract) sent once
+               per virtual user before its first request, e.g. a login
+               whose token later requests use as {{token}}
+    Extracted variables belong to the virtual user and override row
+    values of the same name. Setup requests are not measured.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        data_dir: Optional[str] = None,
+        shard: int = 0,
+        shards: int = 1,
+    ):
+        self.config = config
+        self.data_dir = data_dir
+        self.shard = shard
+        self.shards = shards
+        self.template = RequestTemplate(config["api"])
+        self.feed = self._feed(config.get("data"))
+        self.extract: Dict[str, str] = dict(config.get("extract") or {})
+        setup = config.get("setup")
+        self.setup = RequestTemplate(setup) if setup else None
+        self.setup_feed = self._feed(setup.get("data")) if setup else None
+        self.setup_extract: Dict[str, str] = dict(setup.get("extract") or {}) if setup else {}
+
+    def _feed(self, data: Optional[Dict[str, Any]]) -> Optional[DataFeed]:
+        if not data:
+            return None
+        path = data["file"]
+        if self.data_dir is not None:
+            path = resolve_data_file(self.data_dir, path)
+        seed = data.get("seed")
+        return DataFeed(
+            path,
+            order=data.get("order", "sequential"),
+            loop=data.get("loop", True),
+            buffer_size=int(data.get("buffer_size", 1000)),
+            shard=self.shard,
+            shards=self.shards,
+            # Shards shuffle differently even when a seed is given
+            seed=seed + self.shard if seed is not None else None,
+        )
+
+    def partition(self, shard: int, shards: int) -> Dict[str, Any]:
+        """Arguments for an identical Scenario covering one shard of the data"""
+        return {"config": self.config, "data_dir": self.data_dir, "shard": shard, "shards": shards}
+
+    @property
+    def uses_data(self) -> bool:
+        return self.feed is not None or self.setup_feed is not None
+
+    @property
+    def static(self) -> bool:
+        """True if every request is identical and can be prepared once"""
+        return self.template.static and not self.extract and self.setup is None
+
+    def validate(self):
+        """Raise ValueError for placeholders no data column or extraction provides"""
+        extracted = set(self.extract) | set(self.setup_extract)
+        checks = [(self.template, self.feed)]
+        if self.setup is not None:
+            checks.append((self.setup, self.setup_feed))
+        for template, feed in checks:
+            known = extracted | (feed.columns() if feed is not None else set())
+            missing = template.placeholders - known
+            if missing:
+                raise ValueError(f"No data column or extracted value for: {', '.join(sorted(missing))}")
+
+    def setup_request(self, session: Session) -> Optional[Dict[str, Any]]:
+        row = self.setup_feed.next() if self.setup_feed is not None else {}
+        if row is None:
+            return None
+        return self.setup.render({**row, **session.variables})
+
+    def next_request(self, session: Session) -> Optional[Dict[str, Any]]:
+        """The next API to send for a virtual user, or None once a
+        non-looping data file has run out"""
+        row = self.feed.next() if self.feed is not None else {}
+        if row is None:
+            return None
+        return self.template.render({**row, **session.variables})
+
+    @staticmethod
+    def absorb(session: Session, rules: Dict[str, str], result: Dict[str, Any]):
+        for name, rule in rules.items():
+            value = extract(result, rule)
+            if value is not None:
+                session.variables[name] = value
+
+    def close(self):
+        for feed in (self.feed, self.setup_feed):
+            if feed is not None:
+                feed.close()
+
+
+def resolve_data_file(data_dir: str, name: str) -> str:
+    """Path of an uploaded data file; names may not leave data_dir"""
+    root = os.path.realpath(data_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"Invalid data file name: {name}")
+    return path
@@ -0,0 +1,418 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Any, Optional, Callable, Iterator, Sequence, Union
+
+from services.api_tester import ApiTester, PreparedRequest, pool_delta
+from services.histogram import RunStats, LatencyHistogram
+from services.load_data import Scenario, Session
+from services.load_history import ColumnarHistory, columns_from_rows
+
+if TYPE_CHECKING:
+    # Annotation only: importing it pulls in SQLAlchemy and the app database,
+    # which load agents and worker processes must not need
+    from services.result_writer import ResultWriter
+
+# Per-second snapshots kept in memory; older ones are only in the history store
+HISTORY_WINDOW = 3600
+
+
+class LoadTest:
+    """In-process load test driving virtual users through ApiTester.
+
+    Without target_rps this is a closed model: `users` loops each send the
+    next request as soon as the previous one completes. With target_rps it
+    is an open model: requests arrive on a fixed schedule whether or not
+    earlier ones have finished, with `users` capping how many are in
+    flight. Latency is then measured from each request's scheduled send
+    time, so a stalled target shows up in the percentiles instead of
+    silently lowering the send rate (coordinated omission).
+    """
+
+    def __init__(
+        self,
+        api_tester: ApiTester,
+        api: Dict[str, Any],
+        users: int = 1,
+        total_requests: Optional[int] = None,
+        duration: Optional[float] = None,
+        target_rps: Optional[float] = None,
+        result_writer: Optional["ResultWriter"] = None,
+        api_id: Optional[str] = None,
+        on_snapshot: Optional[Callable[["LoadTest"], None]] = None,
+        warmup_requests: int = 0,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        history_store: Optional[ColumnarHistory] = None,
+        scenario: Optional[Scenario] = None,
+    ):
+        if total_requests is None and duration is None:
+            raise ValueError("Either total_requests or duration must be set")
+
+        self.id = str(uuid.uuid4())
+        self.api_tester = api_tester
+        self.api = api
+        # Compiled once in run() and sent by every virtual user
+        self.request: Optional[PreparedRequest] = None
+        # Data-driven requests and per-user variables; None sends `api` as is
+        self.scenario = scenario
+        self.users = max(1, users)
+        self.total_requests = total_requests
+        self.duration = duration
+        self.target_rps = target_rps
+        # When set, every request is also stored as a TestResult row
+        self.result_writer = result_writer
+        self.api_id = api_id
+        # Called after every per-second snapshot, e.g. to push live progress
+        self.on_snapshot = on_snapshot
+        # Called with every measured (non-warm-up) result
+        self.on_result = on_result
+        # Sent before measuring starts and excluded from every statistic
+        self.warmup_requests = max(0, warmup_requests)
+
+        self.status = "pending"
+        # Why the run failed, when status is "failed"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        # Whole-run aggregate plus a window reset at every snapshot
+        self.issued = 0
+        self.run_stats = RunStats()
+        self.interval_stats = RunStats()
+        # Time actually spent in ApiTester, without schedule lag (open model)
+        self.service_time = LatencyHistogram()
+        self.active_users = 0
+
+        # Recent per-second snapshots for status; the store keeps all of them
+        self.history: deque = deque(maxlen=HISTORY_WINDOW)
+        self.history_store = history_store
+
+        self._pool_before: Optional[Dict[str, Any]] = None
+        self._deadline: Optional[float] = None
+        # Set when a non-looping data file runs out
+        self._exhausted = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Schedule the test on the running event loop and return immediately"""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        """Cancel a running test; collected stats are kept"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    async def run(self):
+        self.status = "running"
+        sampler = None
+        try:
+            if self.scenario is None or self.scenario.static:
+                self.request = self.api_tester.prepare(self.api)
+            if self.warmup_requests:
+                await self._warm_up()
+            self.started_at = time.monotonic()
+            self._pool_before = self.api_tester.pool_stats()
+            self.run_stats = RunStats()
+            self.interval_stats = RunStats()
+            if self.duration is not None:
+                self._deadline = self.started_at + self.duration
+
+            sampler = asyncio.create_task(self._sample())
+            if self.target_rps:
+                await self._open_model()
+            else:
+                await asyncio.gather(*(self._user() for _ in range(self.users)))
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "stopped"
+        except Exception as e:
+            print(f"Load test {self.id} failed: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+            if sampler is not None:
+                sampler.cancel()
+            self._snapshot()
+            if self.history_store is not None:
+                self.history_store.close()
+            if self.scenario is not None:
+                self.scenario.close()
+
+    async def _warm_up(self):
+        remaining = self.warmup_requests
+
+        async def warm_user():
+            nonlocal remaining
+            session = Session()
+            while remaining > 0:
+                remaining -= 1
+                request = await self._next_request(session)
+                if request is None:
+                    break
+                await self._send(session, request)
+
+        await asyncio.gather(*(warm_user() for _ in range(min(self.users, self.warmup_requests))))
+
+    def _claim(self) -> bool:
+        """Reserve the next request from the budget, if any is left"""
+        if self._exhausted:
+            return False
+        if self.total_requests is not None and self.issued >= self.total_requests:
+            return False
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return False
+        self.issued += 1
+        return True
+
+    async def _next_request(self, session: Session) -> Optional[Union[PreparedRequest, Dict[str, Any]]]:
+        """What a virtual user sends next; None once the data has run out"""
+        if self.scenario is None or self.scenario.static:
+            return self.request
+        if not session.ready:
+            await self._set_up(session)
+        request = self.scenario.next_request(session)
+        if request is None:
+            self._exhausted = True
+        return request
+
+    async def _set_up(self, session: Session):
+        """Send the scenario's setup request once per session (not measured)"""
+        async with session.lock:
+            if session.ready:
+                return
+            session.ready = True
+            if self.scenario.setup is None:
+                return
+            api = self.scenario.setup_request(session)
+            if api is None:
+                return
+            result = await self.api_tester.test_api(api, decode_body=bool(self.scenario.setup_extract))
+            self.scenario.absorb(session, self.scenario.setup_extract, result)
+
+    async def _send(self, session: Session, request: Union[PreparedRequest, Dict[str, Any]]) -> Dict[str, Any]:
+        extract = self.scenario.extract if self.scenario is not None else None
+        # Bodies are only decoded when a value has to be extracted from them
+        result = await self.api_tester.test_api(request, decode_body=bool(extract))
+        if extract:
+            self.scenario.absorb(session, extract, result)
+        return result
+
+    async def _user(self):
+        self.active_users += 1
+        session = Session()
+        try:
+            while self._claim():
+                request = await self._next_request(session)
+                if request is None:
+                    break
+                result = await self._send(session, request)
+                await self._complete(result)
+        finally:
+            self.active_users -= 1
+
+    async def _open_model(self):
+        """Send on a constant-rate schedule, at most `users` requests in flight"""
+        interval = 1.0 / self.target_rps
+        slots = asyncio.Semaphore(self.users)
+        # Arrivals take turns acting as the `users` virtual users
+        sessions = [Session() for _ in range(self.users)]
+        in_flight = set()
+        sent = 0
+        try:
+            while self._claim():
+                scheduled = self.started_at + sent * interval
+                sent += 1
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await slots.acquire()
+                task = asyncio.create_task(self._arrival(scheduled, slots, sessions[sent % self.users]))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            # When stopped (or failed), no arrival may outlive run(): it would
+            # record after the final snapshot and read from a closed data feed
+            pending = list(in_flight)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _arrival(self, scheduled: float, slots: asyncio.Semaphore, session: Session):
+        self.active_users += 1
+        try:
+            request = await self._next_request(session)
+            if request is None:
+                return
+            result = await self._send(session, request)
+            # Count the time this request spent waiting behind its schedule
+            service_time = result.get("response_time", 0)
+            result["response_time"] = max(service_time, time.monotonic() - scheduled)
+            result["service_time"] = service_time
+            await self._complete(result, service_time)
+        finally:
+            self.active_users -= 1
+            slots.release()
+
+    async def _complete(self, result: Dict[str, Any], service_time: Optional[float] = None):
+        self._record(result)
+        self.service_time.record((result.get("response_time", 0) if service_time is None else service_time) * 1000)
+        if self.on_result is not None:
+            self.on_result(result)
+        if self.result_writer is not None:
+            await self.result_writer.put(self.api_id, result)
+
+    def _record(self, result: Dict[str, Any]):
+        self.run_stats.record(result)
+        self.interval_stats.record(result)
+
+    async def _sample(self):
+        while True:
+            await asyncio.sleep(1)
+            self._snapshot()
+
+    def _snapshot(self):
+        previous = self.history[-1] if self.history else None
+        prev_elapsed = previous["elapsed"] if previous else 0.0
+        elapsed = self.elapsed
+        window = max(elapsed - prev_elapsed, 1e-9)
+        interval = self.interval_stats
+        self.interval_stats = RunStats()
+        total = self.run_stats.histogram
+
+        snapshot = {
+            "timestamp": int(time.time()),
+            "elapsed": elapsed,
+            "user_count": self.active_users,
+            "requests_per_second": interval.total / window,
+            "failures_per_second": interval.failures / window,
+            # Percentiles cover this interval only; the totals cover the run
+            **interval.histogram.percentiles(),
+            "total_requests": total.count,
+            "total_failures": self.run_stats.failures,
+            "avg_response_time": total.mean,
+            "min_response_time": total.min or 0.0,
+            "max_response_time": total.max or 0.0,
+        }
+        self.history.append(snapshot)
+        if self.history_store is not None:
+            self.history_store.append(snapshot)
+        if self.on_snapshot is not None:
+            self.on_snapshot(self)
+
+    def full_history(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Snapshots with elapsed in [start, end], from the store when there is one"""
+        if self.history_store is not None:
+            return self.history_store.rows(start, end)
+        return (
+            snapshot for snapshot in list(self.history)
+            if (start is None or snapshot["elapsed"] >= start) and (end is None or snapshot["elapsed"] <= end)
+        )
+
+    def history_columns(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Columnar history for elapsed in [start, end]"""
+        if self.history_store is not None:
+            return self.history_store.select(columns, start, end)
+        selected = columns_from_rows(list(self.full_history(start, end)))
+        if columns:
+            selected = {column: values for column, values in selected.items() if column in columns}
+        return selected
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def stats(self) -> Dict[str, Any]:
+        """Current aggregates; response times are in milliseconds"""
+        last = self.history[-1] if self.history else None
+        summary = self.run_stats.summary()
+        return {
+            "test_id": self.id,
+            "status": self.status,
+            "url": self.api.get("url"),
+            "method": self.api.get("method", "GET"),
+            "users": self.users,
+            "target_rps": self.target_rps,
+            "elapsed": self.elapsed,
+            "requests_per_second": last["requests_per_second"] if last else 0.0,
+            "avg_response_time": summary["avg_response_time"],
+            "min_response_time": summary["min_response_time"],
+            "max_response_time": summary["max_response_time"],
+            "failures": summary["failed_requests"],
+            "total_requests": summary["total_requests"],
+            "errors": summary["errors"],
+            "throughput": summary["throughput"],
+            "percentiles": summary["percentiles"],
+            "service_time": self.service_time.summary() if self.target_rps else None,
+            "status_codes": summary["status_codes"],
+            "pool": self._pool_usage(),
+            "error": self.error,
+            # A non-looping data file ran out before the budget did
+            "data_exhausted": self._exhausted,
+        }
+
+    def _pool_usage(self) -> Optional[Dict[str, Any]]:
+        # The pool is shared, so concurrent tests show up in each other's figures
+        if not self._pool_before:
+            return None
+        return pool_delta(self._pool_before, self.api_tester.pool_stats())
+
+
+class ArchivedLoadTest:
+    """A finished load test read back from its history store.
+
+    Serves the same status and history queries as the LoadTest it was
+    archived from, but keeps nothing in memory: final stats and snapshots
+    are both read from the store.
+    """
+
+    running = False
+
+    def __init__(self, test_id: str, history_store: ColumnarHistory, final_stats: Dict[str, Any]):
+        self.id = test_id
+        self.history_store = history_store
+        self.status = final_stats["status"]
+        self._stats = final_stats
+
+    @classmethod
+    def archive(cls, test: LoadTest) -> "ArchivedLoadTest":
+        """Persist a finished test's final stats so it can be dropped from memory"""
+        stats = test.stats()
+        test.history_store.write_stats(stats)
+        return cls(test.id, test.history_store, stats)
+
+    @classmethod
+    def load(cls, test_id: str, history_store: ColumnarHistory) -> Optional["ArchivedLoadTest"]:
+        stats = history_store.read_stats()
+        return cls(test_id, history_store, stats) if stats is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return self._stats
+
+    def full_history(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        return self.history_store.rows(start, end)
+
+    def history_columns(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return self.history_store.select(columns, start, end)
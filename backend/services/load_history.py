@@ -0,0 +1,169 @@
+import json
+import math
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Optional, Iterator, Sequence, Tuple
+
+# Snapshot fields, in the order LoadTest._snapshot produces them
+HISTORY_COLUMNS = (
+    "timestamp",
+    "elapsed",
+    "user_count",
+    "requests_per_second",
+    "failures_per_second",
+    "p50",
+    "p90",
+    "p95",
+    "p99",
+    "p999",
+    "total_requests",
+    "total_failures",
+    "avg_response_time",
+    "min_response_time",
+    "max_response_time",
+)
+
+# Returned as ints rather than floats when rows are read back
+INTEGER_COLUMNS = {"timestamp", "user_count", "total_requests", "total_failures"}
+
+ITEM_SIZE = array("d").itemsize
+
+# Final stats of a finished test, written next to its columns
+STATS_FILE = "stats.json"
+
+
+class ColumnarHistory:
+    """Append-only load-test history stored as one float64 file per column.
+
+    Appending a snapshot writes 8 bytes per column. Queries memory-map only
+    the columns they need and binary-search `elapsed` (always increasing)
+    for the requested time range, so reading a slice of a long run costs
+    the size of the slice rather than the whole history.
+    """
+
+    def __init__(self, directory: str, columns: Sequence[str] = HISTORY_COLUMNS):
+        self.directory = directory
+        self.columns = tuple(columns)
+        self._files: Optional[Dict[str, Any]] = None
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.f64")
+
+    def append(self, snapshot: Dict[str, Any]):
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._files = {column: open(self._path(column), "ab") for column in self.columns}
+        for column in self.columns:
+            f = self._files[column]
+            f.write(array("d", [float(snapshot.get(column) or 0.0)]).tobytes())
+            f.flush()
+
+    def close(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+
+    def write_stats(self, stats: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, STATS_FILE), "w") as f:
+            json.dump(stats, f)
+
+    def read_stats(self) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, STATS_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def __len__(self) -> int:
+        path = self._path("elapsed")
+        return os.path.getsize(path) // ITEM_SIZE if os.path.exists(path) else 0
+
+    def _read(self, column: str, rows: int) -> Tuple[memoryview, Optional[mmap.mmap]]:
+        """The first `rows` values of a column, mapped rather than copied"""
+        if not rows:
+            return memoryview(array("d")), None
+        with open(self._path(column), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), rows * ITEM_SIZE, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast("d"), mapped
+
+    def select(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, array]:
+        """Copies of the requested columns for elapsed in [start, end]"""
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        rows = len(self)
+        elapsed, elapsed_map = self._read("elapsed", rows)
+        try:
+            first = bisect_left(elapsed, start) if start is not None else 0
+            last = bisect_right(elapsed, end) if end is not None else rows
+        finally:
+            elapsed.release()
+            if elapsed_map is not None:
+                elapsed_map.close()
+
+        selected = {}
+        for column in columns:
+            view, mapped = self._read(column, rows)
+            try:
+                selected[column] = array("d", view[first:last])
+            finally:
+                view.release()
+                if mapped is not None:
+                    mapped.close()
+        return selected
+
+    def rows(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        selected = self.select(start=start, end=end)
+        for i in range(len(selected["elapsed"])):
+            yield {column: _cast(column, selected[column][i]) for column in self.columns}
+
+
+def _cast(column: str, value: float):
+    return int(value) if column in INTEGER_COLUMNS else value
+
+
+def columns_from_rows(rows: Sequence[Dict[str, Any]], columns: Sequence[str] = HISTORY_COLUMNS) -> Dict[str, array]:
+    """Columnar view of in-memory snapshots, for tests without a stored history"""
+    return {column: array("d", (float(row.get(column) or 0.0) for row in rows)) for column in columns}
+
+
+def downsample(selected: Dict[str, Sequence[float]], max_points: int) -> Dict[str, Any]:
+    """Reduce columns to at most max_points buckets of min/max/avg.
+
+    Snapshots are taken once a second, so buckets are equal runs of rows;
+    `elapsed` reports each bucket's first sample.
+    """
+    elapsed = selected.get("elapsed", [])
+    rows = len(elapsed)
+    size = max(1, math.ceil(rows / max_points)) if max_points > 0 else max(rows, 1)
+    bounds = [(i, min(i + size, rows)) for i in range(0, rows, size)]
+
+    series = {}
+    for column, values in selected.items():
+        if column in ("elapsed", "timestamp"):
+            continue
+        minimum: List[float] = []
+        maximum: List[float] = []
+        average: List[float] = []
+        for first, last in bounds:
+            bucket = values[first:last]
+            minimum.append(min(bucket))
+            maximum.append(max(bucket))
+            average.append(sum(bucket) / len(bucket))
+        series[column] = {"min": minimum, "max": maximum, "avg": average}
+
+    return {
+        "points": len(bounds),
+        "rows": rows,
+        "bucket_size": size,
+        "elapsed": [elapsed[first] for first, _ in bounds],
+        "timestamp": [int(selected["timestamp"][first]) for first, _ in bounds] if "timestamp" in selected else None,
+        "series": series,
+    }
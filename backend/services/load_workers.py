@@ -0,0 +1,234 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+from typing import Dict, Any, List, Optional
+
+from services.api_tester import ApiTester
+from services.histogram import RunStats, LatencyHistogram
+from services.load_data import Scenario
+from services.load_engine import LoadTest
+
+# How often each worker ships its latest histogram/counter delta
+REPORT_INTERVAL = 1.0
+
+# How long to wait for workers to flush their last delta after a stop
+STOP_GRACE_SECONDS = 10.0
+
+# How often the coordinator polls the report queue when it is empty
+COLLECT_POLL_SECONDS = 0.05
+
+POOL_COUNTERS = ("requests", "new_connections", "reused_connections", "pool_waits", "pool_timeouts")
+
+
+def split(total: int, parts: int) -> List[int]:
+    """Split `total` into `parts` near-equal integer shares"""
+    share, remainder = divmod(total, parts)
+    return [share + (1 if i < remainder else 0) for i in range(parts)]
+
+
+def run_shard(shard: int, plan: Dict[str, Any], options: Dict[str, Any], reports, stop_event):
+    """Worker process entry point: one event loop driving one shard of users"""
+    try:
+        asyncio.run(drive_shard(shard, plan, options, reports, stop_event))
+    except Exception as e:
+        reports.put(("done", shard, {"status": "failed", "error": str(e), "pool": None}))
+
+
+async def drive_shard(shard: int, plan: Dict[str, Any], options: Dict[str, Any], reports, stop_event):
+    """Run one shard, sending ("started" | "delta" | "done", shard, payload)
+    messages through reports.put() until it finishes or stop_event is set"""
+    api_tester = ApiTester(**options)
+    stats = RunStats()
+    service_time = LatencyHistogram()
+
+    def record(result: Dict[str, Any]):
+        stats.record(result)
+        service_time.record(result.get("service_time", result.get("response_time", 0)) * 1000)
+
+    scenario = Scenario(**plan["scenario"]) if plan.get("scenario") else None
+    test = LoadTest(api_tester, plan["api"], on_result=record, scenario=scenario, **plan["load"])
+
+    def flush():
+        nonlocal stats, service_time
+        reports.put(("delta", shard, {
+            "stats": stats.to_dict(),
+            "service_time": service_time.to_dict(),
+            "active_users": test.active_users,
+        }))
+        stats = RunStats()
+        service_time = LatencyHistogram()
+
+    started = False
+    task = test.start()
+    try:
+        while not task.done():
+            # Poll quickly until warm-up ends so the coordinator's clock starts on time
+            await asyncio.wait({task}, timeout=REPORT_INTERVAL if started else 0.05)
+            if stop_event.is_set():
+                test.stop()
+            if not started and test.started_at is not None:
+                started = True
+                reports.put(("started", shard, None))
+            elif started:
+                flush()
+        flush()
+        reports.put(("done", shard, {"status": test.status, "pool": test.stats()["pool"]}))
+    finally:
+        await api_tester.close()
+
+
+class ShardedLoadTest(LoadTest):
+    """LoadTest whose virtual users are spread over worker processes.
+
+    A single event loop tops out at one core, so each worker runs its own
+    loop and ApiTester on a shard of the users (and of the request budget
+    and target rate). Workers stream compact histogram deltas back once a
+    second; they are merged here, so snapshots, stats and reports work
+    exactly as for an in-process test. Per-request hooks (on_result,
+    result_writer) only exist inside the workers and are not supported.
+    """
+
+    def __init__(self, api_tester: ApiTester, api: Dict[str, Any], processes: int = 2, **kwargs):
+        super().__init__(api_tester, api, **kwargs)
+        self.processes = max(1, min(processes, self.users, os.cpu_count() or 1))
+        self._shard_users: Dict[int, int] = {}
+        self._shard_pools: Dict[int, Dict[str, Any]] = {}
+        self._shard_errors: List[str] = []
+        self._sampler: Optional[asyncio.Task] = None
+
+    def _plans(self) -> List[Dict[str, Any]]:
+        users = split(self.users, self.processes)
+        requests = split(self.total_requests, self.processes) if self.total_requests is not None else None
+        warmup = split(self.warmup_requests, self.processes)
+        return [
+            {
+                "api": self.api,
+                # Each shard streams its own share of the data file
+                "scenario": self.scenario.partition(i, self.processes) if self.scenario else None,
+                "load": {
+                    "users": users[i],
+                    "total_requests": requests[i] if requests is not None else None,
+                    "duration": self.duration,
+                    # Each shard carries a rate proportional to its users
+                    "target_rps": self.target_rps * users[i] / self.users if self.target_rps else None,
+                    "warmup_requests": warmup[i],
+                },
+            }
+            for i in range(self.processes)
+        ]
+
+    async def run(self):
+        context = multiprocessing.get_context("spawn")
+        reports = context.Queue()
+        stop_event = context.Event()
+        workers = [
+            context.Process(
+                target=run_shard,
+                args=(shard, plan, self.api_tester.options, reports, stop_event),
+                daemon=True,
+            )
+            for shard, plan in enumerate(self._plans())
+        ]
+        pending = set(range(len(workers)))
+        self.status = "running"
+        try:
+            for worker in workers:
+                worker.start()
+            await self._collect(reports, pending, workers)
+            self.status = "failed" if self._shard_errors else "completed"
+            self.error = "; ".join(self._shard_errors) or None
+        except asyncio.CancelledError:
+            stop_event.set()
+            try:
+                await asyncio.wait_for(self._collect(reports, pending, workers), STOP_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.status = "stopped"
+        except Exception as e:
+            print(f"Load test {self.id} failed: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            stop_event.set()
+            self._finish()
+            await asyncio.to_thread(self._reap, workers)
+
+    def _finish(self):
+        if self.started_at is not None:
+            self.finished_at = time.monotonic()
+        if self._sampler is not None:
+            self._sampler.cancel()
+        self.active_users = 0
+        self._snapshot()
+        if self.history_store is not None:
+            self.history_store.close()
+
+    async def _collect(self, reports, pending: set, workers: List[multiprocessing.Process]):
+        # Non-blocking reads only: a reader thread left behind by a cancelled
+        # collect could swallow a message nobody would then handle
+        exited_polls = 0
+        while pending:
+            try:
+                kind, shard, payload = reports.get_nowait()
+            except queue.Empty:
+                if any(worker.is_alive() for worker in workers):
+                    exited_polls = 0
+                else:
+                    # Look once more after the workers exit, for a last message in transit
+                    exited_polls += 1
+                    if exited_polls > 1:
+                        raise RuntimeError("load workers exited without reporting")
+                await asyncio.sleep(COLLECT_POLL_SECONDS)
+                continue
+            self._handle(kind, shard, payload, pending)
+
+    def _handle(self, kind: str, shard: int, payload: Optional[Dict[str, Any]], pending: set):
+        if kind == "started" and self.started_at is None:
+            # Clock starts once the first shard is past its warm-up
+            self.started_at = time.monotonic()
+            self.run_stats = RunStats()
+            self.interval_stats = RunStats()
+            self._sampler = asyncio.create_task(self._sample())
+        elif kind == "delta":
+            self._merge(shard, payload)
+        elif kind == "done":
+            pending.discard(shard)
+            self._shard_users[shard] = 0
+            if payload.get("pool"):
+                self._shard_pools[shard] = payload["pool"]
+            if payload["status"] == "failed":
+                self._shard_errors.append(payload.get("error") or f"shard {shard} failed")
+
+    def _merge(self, shard: int, payload: Dict[str, Any]):
+        delta = RunStats.from_dict(payload["stats"])
+        self.run_stats.merge(delta)
+        self.interval_stats.merge(delta)
+        self.service_time.merge(LatencyHistogram.from_dict(payload["service_time"]))
+        self.issued += delta.total
+        self._shard_users[shard] = payload["active_users"]
+        self.active_users = sum(self._shard_users.values())
+
+    @staticmethod
+    def _reap(workers: List[multiprocessing.Process]):
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def _pool_usage(self) -> Optional[Dict[str, Any]]:
+        """Sum of the workers' own pools, available once they finish"""
+        if not self._shard_pools:
+            return None
+        pools = list(self._shard_pools.values())
+        usage = {key: sum(pool[key] for pool in pools) for key in POOL_COUNTERS}
+        connected = usage["new_connections"] + usage["reused_connections"]
+        usage["reuse_rate"] = usage["reused_connections"] / connected if connected else 0.0
+        usage["peak_in_flight"] = sum(pool["peak_in_flight"] for pool in pools)
+        return usage
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["processes"] = self.processes
+        return stats
@@ -0,0 +1,76 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.catalog import ApiCatalog
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# Rendered output is flushed to the client in pieces of about this size
+CHUNK_SIZE = 64 * 1024
+
+
+class ReportRenderer:
+    """Renders the HTML test report from templates/report.html.
+
+    Output is streamed in chunks as the template generates it, and the
+    chunks of the last complete render are kept with the catalog version
+    they were made from, so viewing an unchanged catalog again is free.
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self._env = None
+        self._cached: Optional[Tuple[int, List[str]]] = None
+
+    def environment(self):
+        """Jinja2 environment, imported and built on the first render"""
+        if self._env is None:
+            import jinja2
+            self._env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(self.template_dir),
+                autoescape=jinja2.select_autoescape(["html"]),
+                trim_blocks=True,
+                lstrip_blocks=True,
+            )
+        return self._env
+
+    def render(self, catalog: ApiCatalog, chart_url: Optional[str] = None) -> Iterator[str]:
+        """Chunks of the report; inputs are captured now, rendering happens lazily"""
+        version = catalog.version
+        if self._cached is not None and self._cached[0] == version:
+            return iter(self._cached[1])
+        # Loaded (and compiled once by the environment) before the response starts
+        template = self.environment().get_template("report.html")
+        context = {
+            "apis": catalog.all(),
+            "summary": catalog.status_summary(),
+            "total": len(catalog),
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "chart_url": chart_url,
+        }
+        return self._generate(catalog, version, template, context)
+
+    def _generate(
+        self,
+        catalog: ApiCatalog,
+        version: int,
+        template: Any,
+        context: Dict[str, Any],
+    ) -> Iterator[str]:
+        chunks: List[str] = []
+        buffer: List[str] = []
+        size = 0
+        for piece in template.generate(**context):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= CHUNK_SIZE:
+                chunks.append("".join(buffer))
+                yield chunks[-1]
+                buffer, size = [], 0
+        if buffer:
+            chunks.append("".join(buffer))
+            yield chunks[-1]
+        # Only cache if nothing changed while rendering
+        if catalog.version == version:
+            self._cached = (version, chunks)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import insert, update, bindparam
+
+from app.database import engine as default_engine
+from app.models import APIRequest, TestResult
+
+
+def result_row(api_id: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+    """TestResult column values for one ApiTester result"""
+    return {
+        "request_id": api_id,
+        "status_code": result.get("status_code"),
+        "response_time": int(round(result.get("response_time", 0) * 1000)),
+        "response_body": result.get("response_body"),
+        "test_status": "pass" if result.get("success") else "fail",
+    }
+
+
+class ResultWriter:
+    """Write-behind queue that batches TestResult inserts.
+
+    Rows are flushed in one transaction every `batch_size` rows or
+    `flush_interval` seconds, whichever comes first. put() waits when the
+    queue is full, which slows producers down instead of growing memory.
+    """
+
+    def __init__(self, engine=default_engine, batch_size: int = 500, flush_interval: float = 0.05, max_queue: int = 20000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.rows_written = 0
+        self.batches_written = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, api_id: Optional[str], result: Dict[str, Any], status: Optional[str] = None):
+        """Queue a result; with a status the API's latest result is updated too"""
+        await self.queue.put((api_id, result, status))
+
+    async def close(self):
+        """Flush everything still queued and stop the writer"""
+        if self._task is None:
+            return
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.rows_written += len(batch)
+                self.batches_written += 1
+            except Exception as e:
+                print(f"Error writing {len(batch)} test results: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, batch: List[tuple]):
+        rows = [result_row(api_id, result) for api_id, result, _ in batch]
+        # Only the last result per API matters for its status
+        latest = {
+            api_id: {"b_api_id": api_id, "b_status": status, "b_result": result}
+            for api_id, result, status in batch
+            if status is not None
+        }
+        with self.engine.begin() as conn:
+            conn.execute(insert(TestResult), rows)
+            if latest:
+                conn.execute(
+                    update(APIRequest)
+                    .where(APIRequest.api_id == bindparam("b_api_id"))
+                    .values(status=bindparam("b_status"), last_result=bindparam("b_result")),
+                    list(latest.values()),
+                )
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterable, Hashable, Tuple
+from urllib.parse import urlparse
+
+
+class TestScheduler:
+    """Runs API tests concurrently under a global and a per-host limit"""
+
+    def __init__(self, max_concurrency: int = 50, max_per_host: int = 10):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return semaphore
+
+    async def run(self, api: Dict[str, Any], fn: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        """Run fn(api) once both a host slot and a global slot are free"""
+        # Take the host slot first so a saturated host doesn't pin global slots
+        async with self._host_semaphore(api.get("url", "")):
+            async with self._global:
+                return await fn(api)
+
+    async def map(
+        self,
+        apis: Iterable[Dict[str, Any]],
+        fn: Callable[[Dict[str, Any]], Awaitable[Any]],
+        concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[Any], None]] = None,
+    ) -> List[Any]:
+        """Run fn over every API, returning results in input order.
+
+        `concurrency` caps how many of these APIs queue for slots at once, so
+        concurrent callers (e.g. several jobs) interleave instead of one
+        large run queueing ahead of everyone else.
+        """
+        apis = list(apis)
+        results: List[Any] = [None] * len(apis)
+        positions = iter(range(len(apis)))
+
+        async def worker():
+            for position in positions:
+                results[position] = await self.run(apis[position], fn)
+                if on_result is not None:
+                    on_result(results[position])
+
+        workers = min(concurrency or len(apis), len(apis))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0  # calls answered by someone else's request
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """fn() for the first caller; later callers get a copy of its result.
+
+        Returns (result, leader), leader being True for the caller that ran fn().
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            result = await asyncio.shield(future)
+            if result is not None:
+                self.shared += 1
+                return {**result, "coalesced": True}, False
+            # The leader was cancelled; go again, possibly as the new leader
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, True
+        except asyncio.CancelledError:
+            # Only the leader was cancelled: wake followers without an error
+            future.set_result(None)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved; it is only an error for callers still waiting
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
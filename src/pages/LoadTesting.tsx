@@ -1,8 +1,20 @@
 import React, { useEffect, useState } from 'react';
-import { Table, Button, InputNumber, Input, Space, Tooltip, Progress } from 'antd';
+import { Table, Button, InputNumber, Input, Space, Tooltip, Progress, Select, Upload } from 'antd';
+import { UploadOutlined } from '@ant-design/icons';
+import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip as ChartTooltip, Legend, ResponsiveContainer } from 'recharts';
 import { getApis } from '../services/api';
-import { startLoadTest, stopLoadTest, getLoadTestStatus, downloadLoadTestReport } from '../services/loadtest';
-import { Api } from '../types';
+import {
+  startLoadTest,
+  stopLoadTest,
+  getLoadTestStatus,
+  downloadLoadTestReport,
+  getLoadTestHistory,
+  uploadLoadTestData,
+  listLoadTestData,
+} from '../services/loadtest';
+import { Api, LoadTestDataFile, LoadTestHistory, LoadTestStatus } from '../types';
+
+const { Option } = Select;
 
 const LoadTesting: React.FC = () => {
   const [apis, setApis] = useState<Api[]>([]);
@@ -11,29 +23,63 @@ const LoadTesting: React.FC = () => {
   const [totalRequests, setTotalRequests] = useState(10);
   const [headers, setHeaders] = useState('');
   const [body, setBody] = useState('');
+  // {{placeholders}} in the URL, headers and body are filled from the data file's columns
+  const [url, setUrl] = useState('');
+  const [dataFiles, setDataFiles] = useState<LoadTestDataFile[]>([]);
+  const [dataFile, setDataFile] = useState<string | undefined>(undefined);
+  const [dataOrder, setDataOrder] = useState<'sequential' | 'random'>('sequential');
+  const [extract, setExtract] = useState('');
   const [testing, setTesting] = useState(false);
-  const [progress, setProgress] = useState<any>({});
+  const [progress, setProgress] = useState<LoadTestStatus>({});
+  const [history, setHistory] = useState<LoadTestHistory | null>(null);
   const [intervalId, setIntervalId] = useState<any>(null);
 
+  const refreshDataFiles = async () => {
+    const { data } = await listLoadTestData();
+    setDataFiles(data.files);
+  };
+
   useEffect(() => {
     getApis().then(setApis);
+    listLoadTestData().then(({ data }) => setDataFiles(data.files));
   }, []);
 
+  const handleDataUpload = async (file: File) => {
+    try {
+      const { data } = await uploadLoadTestData(file);
+      await refreshDataFiles();
+      setDataFile(data.file);
+    } catch (error) {
+      console.error('Upload failed:', error);
+    }
+  };
+
+  const selectApi = (api: Api) => {
+    setSelectedApi(api);
+    setUrl(api.url);
+  };
+
   const startTest = async () => {
     if (!selectedApi) return;
     setTesting(true);
     setProgress({});
+    setHistory(null);
     await startLoadTest({
-      url: selectedApi.url,
+      url: url || selectedApi.url,
       method: selectedApi.method,
       concurrent_users: concurrentUsers,
       total_requests: totalRequests,
       headers: headers ? JSON.parse(headers) : {},
       body: body ? JSON.parse(body) : undefined,
+      data: dataFile ? { file: dataFile, order: dataOrder } : undefined,
+      extract: extract ? JSON.parse(extract) : undefined,
     });
     const id = setInterval(async () => {
       const { data } = await getLoadTestStatus();
       setProgress(data);
+      // Downsampled server-side, so long runs stay cheap to poll and draw
+      const { data: historyData } = await getLoadTestHistory({ max_points: 300, columns: 'p95,requests_per_second' });
+      setHistory(historyData);
     }, 1000);
     setIntervalId(id);
   };
@@ -64,6 +110,15 @@ const LoadTesting: React.FC = () => {
     }
   };
 
+  const getHistoryChartData = () => {
+    if (!history) return [];
+    return history.elapsed.map((elapsed, i) => ({
+      elapsed: Math.round(elapsed),
+      p95: history.series.p95.max[i],
+      rps: history.series.requests_per_second.avg[i],
+    }));
+  };
+
   const columns = [
     {
       title: 'API URL',
@@ -84,7 +139,7 @@ const LoadTesting: React.FC = () => {
       title: 'Select',
       key: 'select',
       render: (_: any, record: Api) => (
-        <Button type={selectedApi?.id === record.id ? 'primary' : 'default'} onClick={() => setSelectedApi(record)}>
+        <Button type={selectedApi?.id === record.id ? 'primary' : 'default'} onClick={() => selectApi(record)}>
           Select
         </Button>
       ),
@@ -104,6 +159,10 @@ const LoadTesting: React.FC = () => {
         <div className="mt-6 p-4 bg-white rounded shadow">
           <h2 className="text-lg font-semibold mb-2">Configure Load Test</h2>
           <Space direction="vertical" size="middle" style={{ width: '100%' }}>
+            <div>
+              <span>URL: </span>
+              <Input value={url} onChange={e => setUrl(e.target.value)} placeholder="https://host/items/{{id}}" />
+            </div>
             <div>
               <span>Concurrent Users: </span>
               <InputNumber
@@ -132,6 +191,40 @@ const LoadTesting: React.FC = () => {
                 <Input.TextArea rows={2} value={body} onChange={e => setBody(e.target.value)} placeholder='{"key": "value"}' />
               </div>
             )}
+            <div>
+              <span>Data File: </span>
+              <Space>
+                <Select
+                  allowClear
+                  style={{ width: 240 }}
+                  placeholder="None (fixed request)"
+                  value={dataFile}
+                  onChange={(value) => setDataFile(value)}
+                >
+                  {dataFiles.map(f => (
+                    <Option key={f.file} value={f.file}>{f.file}</Option>
+                  ))}
+                </Select>
+                <Select value={dataOrder} onChange={(value) => setDataOrder(value)} style={{ width: 140 }} disabled={!dataFile}>
+                  <Option value="sequential">Sequential</Option>
+                  <Option value="random">Random</Option>
+                </Select>
+                <Upload
+                  accept=".csv,.json,.jsonl,.ndjson"
+                  showUploadList={false}
+                  beforeUpload={(file) => {
+                    handleDataUpload(file);
+                    return false;
+                  }}
+                >
+                  <Button icon={<UploadOutlined />}>Upload</Button>
+                </Upload>
+              </Space>
+            </div>
+            <div>
+              <span>Extract (JSON): </span>
+              <Input.TextArea rows={2} value={extract} onChange={e => setExtract(e.target.value)} placeholder='{"token": "data.access_token", "session": "header:X-Session"}' />
+            </div>
             <Space>
               <Button type="primary" onClick={startTest} disabled={testing}>Start Test</Button>
               <Button onClick={stopTestHandler} disabled={!testing}>Stop Test</Button>
@@ -142,7 +235,7 @@ const LoadTesting: React.FC = () => {
           {testing && (
             <div className="mt-4">
               <h3 className="font-semibold mb-2">Live Progress</h3>
-              <Progress percent={progress.total_requests ? (Number(progress.total_requests) / totalRequests) * 100 : 0} />
+              <Progress percent={progress.total_requests ? (progress.total_requests / totalRequests) * 100 : 0} />
               <div className="mt-2 text-sm">
                 <div>Requests/sec: {progress.requests_per_second}</div>
                 <div>Avg Response Time: {progress.avg_response_time} ms</div>
@@ -153,6 +246,23 @@ const LoadTesting: React.FC = () => {
               </div>
             </div>
           )}
+          {history && history.points > 0 && (
+            <div className="mt-4">
+              <h3 className="font-semibold mb-2">History</h3>
+              <ResponsiveContainer width="100%" height={300}>
+                <LineChart data={getHistoryChartData()}>
+                  <CartesianGrid strokeDasharray="3 3" />
+                  <XAxis dataKey="elapsed" unit="s" />
+                  <YAxis yAxisId="latency" unit=" ms" />
+                  <YAxis yAxisId="rps" orientation="right" />
+                  <ChartTooltip />
+                  <Legend />
+                  <Line yAxisId="latency" type="monotone" dataKey="p95" stroke="#1890ff" strokeWidth={2} dot={false} name="p95 (ms)" />
+                  <Line yAxisId="rps" type="monotone" dataKey="rps" stroke="#52c41a" strokeWidth={2} dot={false} name="Requests/sec" />
+                </LineChart>
+              </ResponsiveContainer>
+            </div>
+          )}
         </div>
       )}
     </div>
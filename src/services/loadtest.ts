@@ -1,7 +1,16 @@
 import axios from 'axios';
+import { LoadTestDataFile, LoadTestHistory } from '../types';
 
 export const startLoadTest = (params: any) => axios.post('/loadtest/start', params);
 export const stopLoadTest = () => axios.post('/loadtest/stop');
 export const getLoadTestStatus = () => axios.get('/loadtest/status');
 export const downloadLoadTestReport = (format = 'json') =>
   axios.get(`/loadtest/report?format=${format}`, { responseType: format === 'csv' ? 'blob' : 'json' });
+export const getLoadTestHistory = (params: { start?: number; end?: number; max_points?: number; columns?: string } = {}) =>
+  axios.get<LoadTestHistory>('/loadtest/history', { params });
+export const uploadLoadTestData = (file: File) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  return axios.post('/loadtest/data', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
+};
+export const listLoadTestData = () => axios.get<{ files: LoadTestDataFile[] }>('/loadtest/data');
@@ -10,12 +10,18 @@ export interface Api {
   test_results?: TestResult;
   original_request?: any;
   original_response?: any;
+  content_hash?: string;
+  duplicate_of?: string | null;
 }
 
 export interface TestResult {
   success: boolean;
   status_code?: number;
   response_time: number;
+  timings?: Record<string, number | null>;
+  cache?: 'miss' | 'revalidated';
+  changed?: boolean | null;
+  coalesced?: boolean;
   response_body?: any;
   headers?: Record<string, string>;
   error?: string;
@@ -28,13 +34,36 @@ export interface LoadTestParams {
   total_requests: number;
   headers?: Record<string, string>;
   body?: any;
+  data?: { file: string; order?: 'sequential' | 'random'; loop?: boolean };
+  extract?: Record<string, string>;
+}
+
+export interface LoadTestDataFile {
+  file: string;
+  size: number;
 }
 
 export interface LoadTestStatus {
-  requests_per_second?: string;
-  avg_response_time?: string;
-  min_response_time?: string;
-  max_response_time?: string;
-  failures?: string;
-  total_requests?: string;
-}
\ No newline at end of file
+  requests_per_second?: number;
+  avg_response_time?: number;
+  min_response_time?: number;
+  max_response_time?: number;
+  failures?: number;
+  total_requests?: number;
+}
+
+export interface LoadTestHistorySeries {
+  min: number[];
+  max: number[];
+  avg: number[];
+}
+
+export interface LoadTestHistory {
+  test_id: string;
+  points: number;
+  rows: number;
+  bucket_size: number;
+  elapsed: number[];
+  timestamp: number[] | null;
+  series: Record<string, LoadTestHistorySeries>;
+}